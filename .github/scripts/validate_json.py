@@ -1,6 +1,10 @@
 import json
+import math
+import multiprocessing
+import re
 import sys
 import os
+import time
 from pathlib import Path
 
 # Define required files and their expected types
@@ -11,6 +15,34 @@ REQUIRED_FILES = {
     "rules.json": list,
 }
 
+# Regex cost check. Rules run over the whole text of a document and modes run
+# over one word at a time, so each is timed on inputs of its own scale.
+INPUT_SIZES = {
+    "rule": (1024, 8192),
+    "mode": (64, 512),
+}
+PATTERN_TIME_BUDGET = 2.0     # seconds for all inputs of one pattern
+SUPERLINEAR_EXPONENT = 1.5    # cost ~ n ** exponent above this is flagged
+MIN_MEASURABLE_SECONDS = 100e-6  # growth below this cost is timer noise
+MAX_ADVERSARIAL_CHARS = 12
+
+# Natural input, written the way rules and modes see it: lowercased, without
+# apostrophes and with punctuation split off
+NATURAL_TEXT = (
+    "the quick brown fox jumps over the lazy dog . shorthand is a method of "
+    "writing that trades the shapes of letters for the sounds of speech , so "
+    "that a practised writer can keep up with a speaker . most systems drop "
+    "silent letters , join common endings like tion and ing into one stroke "
+    "and leave out vowels wherever the meaning stays clear . its a habit that "
+    "takes months to build , but once learned it is hard to lose ! "
+)
+
+# Characters that are regex syntax rather than text to match
+REGEX_SYNTAX = set("()[]{}?*+|^$.\\-,:")
+# Group prefixes such as (?: (?= (?<! and (?P<name>
+GROUP_PREFIX = re.compile(r"\(\?(?:<?[=!]|:|P?<\w+>|P=\w+\)|[aiLmsux-]+[:)])")
+
+
 def validate_json(filename, data):
     """ Validate JSON structure based on filename """
     if filename == "rules.json":
@@ -20,6 +52,210 @@ def validate_json(filename, data):
             for key in ["name", "regex", "replacement"]:
                 if key not in rule:
                     raise ValueError(f"Rule {i} missing key: {key}")
+    elif filename == "modes.json":
+        for name, mode in data.items():
+            if not isinstance(mode, dict):
+                raise ValueError(f"Mode '{name}' is not a dictionary.")
+            for key in ["pattern", "points"]:
+                if key not in mode:
+                    raise ValueError(f"Mode '{name}' missing key: {key}")
+
+
+def literal_chars(pattern):
+    """ Characters a pattern matches literally, in order of first appearance """
+    chars = []
+    escaped = False
+    for char in GROUP_PREFIX.sub("(", pattern):
+        if escaped:
+            escaped = False
+            # \b, \s, \1 and friends are classes or references, not text
+            if char.isalnum():
+                continue
+        elif char == "\\":
+            escaped = True
+            continue
+        elif char in REGEX_SYNTAX or char.isdigit():
+            continue
+        if char not in chars:
+            chars.append(char)
+    return chars
+
+
+def cost_inputs(pattern, size):
+    """
+    Inputs of about `size` characters for timing a pattern, as (label, text).
+
+    Besides natural text, these are the usual triggers of runaway backtracking:
+    long runs of one character the pattern matches, runs of two of its
+    characters in turn, each followed by a character that makes the overall
+    match fail at the very end.
+    """
+    chars = ["a", " "] + [c for c in literal_chars(pattern) if c not in "a "]
+    chars = chars[:MAX_ADVERSARIAL_CHARS]
+
+    natural = NATURAL_TEXT * (size // len(NATURAL_TEXT) + 1)
+    inputs = [("natural text", natural[:size])]
+    for char in chars:
+        inputs.append((f"{char!r} run", char * size))
+        inputs.append((f"{char!r} run + '!'", char * (size - 1) + "!"))
+    for first, second in zip(chars, chars[1:]):
+        inputs.append((f"{first + second!r} run + '!'", (first + second) * (size // 2 - 1) + "!"))
+    return inputs
+
+
+def scan_rule(regex, text):
+    """ One rule pass over a text, as re.sub finds its matches """
+    for _ in regex.finditer(text):
+        pass
+
+
+def scan_mode(pattern, word):
+    """ One mode over a word, searched forward from past each hit like the renderer does """
+    pos = 0
+    while pos < len(word):
+        match = pattern.search(word, pos)
+        if match is None:
+            break
+        pos = match.start() + 1
+
+
+def time_call(function, *args):
+    """ Best time of one call in seconds, repeating fast calls to get above timer noise """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= 5e-4:
+            break
+        number *= 4
+    best = elapsed
+    for _ in range(4):
+        start = time.perf_counter()
+        for _ in range(number):
+            function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def measure_pattern(kind, pattern, connection):
+    """ Worker process: time a pattern on every input and send the timings as each size finishes """
+    regex = re.compile(pattern)
+    scan = scan_rule if kind == "rule" else scan_mode
+    for size in INPUT_SIZES[kind]:
+        timings = {label: time_call(scan, regex, text) for label, text in cost_inputs(pattern, size)}
+        connection.send((size, timings))
+    connection.close()
+
+
+def pattern_cost(kind, pattern):
+    """
+    Time a pattern in a separate process that is killed once it runs over
+    PATTERN_TIME_BUDGET, since a regex stuck backtracking cannot be
+    interrupted from Python. Returns ({size: {label: seconds}}, timed_out).
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    worker = multiprocessing.Process(target=measure_pattern, args=(kind, pattern, sender),
+                                     daemon=True)
+    worker.start()
+    sender.close()
+
+    timings = {}
+    deadline = time.monotonic() + PATTERN_TIME_BUDGET
+    timed_out = False
+    while len(timings) < len(INPUT_SIZES[kind]):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not receiver.poll(remaining):
+            timed_out = True
+            break
+        try:
+            size, size_timings = receiver.recv()
+        except EOFError:
+            raise RuntimeError(f"timing worker for {pattern!r} exited unexpectedly")
+        timings[size] = size_timings
+
+    if timed_out:
+        worker.terminate()
+    worker.join()
+    receiver.close()
+    return timings, timed_out
+
+
+def growth_exponent(timings, label):
+    """ Exponent k of cost ~ n ** k between the smallest and largest input, or None if too fast to tell """
+    small, large = min(timings), max(timings)
+    if timings[large][label] < MIN_MEASURABLE_SECONDS:
+        return None
+    ratio = max(timings[large][label], 1e-9) / max(timings[small][label], 1e-9)
+    return math.log(ratio) / math.log(large / small)
+
+
+def steepest_growth(timings):
+    """ The input whose cost grows fastest with size, and its growth exponent """
+    exponents = {label: growth_exponent(timings, label) for label in timings[max(timings)]}
+    steepest = max(exponents, key=lambda label: exponents[label] or 0)
+    return steepest, exponents[steepest]
+
+
+def check_pattern_costs(patterns):
+    """
+    Time every (kind, name, pattern) and print a cost report. Returns the
+    number of failures.
+
+    A pattern fails if it runs over its time budget, which is what
+    catastrophic backtracking looks like. Superlinear growth is flagged for
+    every pattern but only fails a rule: rules run over a whole document, while
+    a mode only ever sees one word.
+    """
+    failures = 0
+    print(f"\nRegex cost report (time budget {PATTERN_TIME_BUDGET:g}s per pattern, "
+          f"input sizes: rules {INPUT_SIZES['rule']}, modes {INPUT_SIZES['mode']} chars)")
+    print(f"{'':2} {'kind':<5} {'largest input':>13} {'growth':>7}  pattern")
+
+    for kind, name, pattern in patterns:
+        label = f"{name}: {pattern}"
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            # The renderer skips patterns Python cannot compile
+            print(f"⚠️ {kind:<5} {'-':>13} {'-':>7}  {label} (not checked, does not compile: {e})")
+            continue
+
+        timings, timed_out = pattern_cost(kind, pattern)
+        if timed_out:
+            failures += 1
+            reached = f"after n={max(timings)}" if timings else "at the smallest input"
+            print(f"❌ {kind:<5} {'timeout':>13} {'-':>7}  {label} "
+                  f"(over {PATTERN_TIME_BUDGET:g}s {reached})")
+            continue
+
+        steepest, exponent = steepest_growth(timings)
+        if exponent is not None and exponent > SUPERLINEAR_EXPONENT:
+            # Time it once more and keep the best of both, so one slow
+            # moment on a shared runner does not fail a pattern
+            retimings, timed_out = pattern_cost(kind, pattern)
+            if not timed_out:
+                for size, size_timings in retimings.items():
+                    for input_label, seconds in size_timings.items():
+                        timings[size][input_label] = min(timings[size][input_label], seconds)
+                steepest, exponent = steepest_growth(timings)
+
+        largest = timings[max(timings)]
+        slowest = max(largest, key=largest.get)
+        superlinear = exponent is not None and exponent > SUPERLINEAR_EXPONENT
+        growth = f"n^{exponent:.1f}" if exponent is not None else "-"
+        cost = f"{largest[slowest] * 1e3:.3f}ms"
+        if superlinear and kind == "rule":
+            failures += 1
+            print(f"❌ {kind:<5} {cost:>13} {growth:>7}  {label} (superlinear on {steepest})")
+        elif superlinear:
+            print(f"⚠️ {kind:<5} {cost:>13} {growth:>7}  {label} (superlinear on {steepest})")
+        else:
+            print(f"✅ {kind:<5} {cost:>13} {growth:>7}  {label}")
+
+    return failures
+
 
 def main(folder):
     folder_path = Path(folder)
@@ -31,6 +267,7 @@ def main(folder):
         sys.exit(1)
 
     # Validate each file
+    contents = {}
     for filename, expected_type in REQUIRED_FILES.items():
         file_path = folder_path / filename
         try:
@@ -41,13 +278,22 @@ def main(folder):
                 raise TypeError(f"{filename} should be a {expected_type.__name__}.")
 
             validate_json(filename, data)
+            contents[filename] = data
             print(f"✅ {filename} is valid.")
 
         except Exception as e:
             print(f"❌ {filename} validation failed: {e}")
             sys.exit(1)
 
-    print("🎉 All JSON files are valid!")
+    # Time every pattern before a slow one can reach the renderers
+    patterns = [("rule", rule["name"], rule["regex"]) for rule in contents["rules.json"]]
+    patterns += [("mode", name, mode["pattern"]) for name, mode in contents["modes.json"].items()]
+    failures = check_pattern_costs(patterns)
+    if failures:
+        print(f"\n❌ {failures} pattern(s) are too slow.")
+        sys.exit(1)
+
+    print("\n🎉 All JSON files are valid!")
 
 if __name__ == "__main__":
     folder = sys.argv[1] if len(sys.argv) > 1 else "."
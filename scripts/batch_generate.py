@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Shorthand Batch PDF Generator
+
+Renders many text files to PDF in one run. The system is loaded and compiled
+once and handed to each worker process when it starts; every worker then
+keeps its tokenization cache across all of the documents it renders. A
+document that fails, or even kills its worker process, is reported in the
+summary without stopping the batch.
+
+Usage:
+    python batch_generate.py <system_folder> <inputs>... <output_dir>
+
+Example:
+    python batch_generate.py static/data/systems/orthic texts/ out/
+    python batch_generate.py static/data/systems/orthic "texts/*.txt" out/ --jobs 8
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from generate_pdf import DEFAULT_TOKEN_CACHE_SIZE, compile_system, load_system, render_file
+
+# Compiled system of the current worker process
+_system = None
+
+
+def find_inputs(patterns: list[str]) -> list[Path]:
+    """
+    Expand input arguments into a sorted list of text files.
+
+    A directory stands for the .txt files directly inside it, and anything else
+    is treated as a glob pattern (a plain file name matches itself).
+    """
+    inputs = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            inputs.update(p for p in path.glob('*.txt') if p.is_file())
+        else:
+            inputs.update(Path(p) for p in glob.glob(pattern, recursive=True) if Path(p).is_file())
+    return sorted(inputs)
+
+
+def init_worker(system) -> None:
+    """Worker initializer: keep the compiled system sent from the parent process."""
+    global _system
+    _system = system
+
+
+def render_document(input_file: Path, output_path: Path, options: dict) -> dict:
+    """
+    Render one document with the worker's system and return its summary.
+
+    Errors are caught and reported in the summary rather than raised, so one bad
+    document cannot take down the batch.
+    """
+    start = time.perf_counter()
+    try:
+        render_file(_system, input_file, output_path, **options)
+    except Exception as e:
+        return failed_document(input_file, time.perf_counter() - start, e)
+    return {'input': str(input_file), 'output': str(output_path), 'ok': True,
+            'seconds': time.perf_counter() - start, 'error': None,
+            'bytes': output_path.stat().st_size}
+
+
+def failed_document(input_file: Path, seconds: float | None, error: Exception) -> dict:
+    """Summary of a document that could not be rendered."""
+    return {'input': str(input_file), 'output': None, 'ok': False,
+            'seconds': seconds, 'error': f'{type(error).__name__}: {error}'}
+
+
+def render_isolated(system, input_file: Path, output_path: Path, options: dict) -> dict:
+    """Render one document in a worker process of its own, so that only it fails if the worker dies."""
+    with ProcessPoolExecutor(max_workers=1, initializer=init_worker,
+                             initargs=(system,)) as executor:
+        try:
+            return executor.submit(render_document, input_file, output_path, options).result()
+        except BrokenProcessPool as e:
+            # The worker itself died, e.g. from running out of memory
+            return failed_document(input_file, None, e)
+
+
+def render_parallel(system, documents: list[tuple[Path, Path]], options: dict, jobs: int):
+    """
+    Render (input, output) documents in `jobs` worker processes, yielding each
+    summary as its document finishes.
+
+    Only as many documents as there are workers are handed out at a time. If a
+    worker dies, the pool breaks and every document in flight fails with it,
+    so those are rendered again one at a time in a process of their own, which
+    pins the failure on the document that caused it. The remaining documents
+    then go to a fresh pool.
+    """
+    queue = deque(documents)
+    while queue:
+        in_flight = {}
+        suspects = []
+        with ProcessPoolExecutor(max_workers=min(jobs, len(queue)), initializer=init_worker,
+                                 initargs=(system,)) as executor:
+            while queue or in_flight:
+                while queue and len(in_flight) < jobs and not suspects:
+                    input_file, output_path = queue.popleft()
+                    future = executor.submit(render_document, input_file, output_path, options)
+                    in_flight[future] = (input_file, output_path)
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    document = in_flight.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool:
+                        suspects.append(document)
+
+        for input_file, output_path in suspects:
+            yield render_isolated(system, input_file, output_path, options)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a PDF for each of many text files using a shorthand system',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    python batch_generate.py static/data/systems/orthic texts/ out/
+    python batch_generate.py static/data/systems/orthic "texts/**/*.txt" out/ --jobs 8
+    python batch_generate.py static/data/systems/orthic a.txt b.txt out/ --beginner
+        '''
+    )
+
+    parser.add_argument('system_folder', type=Path,
+                       help='Path to system folder containing JSON files')
+    parser.add_argument('inputs', nargs='+',
+                       help='Input text files, directories of .txt files or glob patterns')
+    parser.add_argument('output_dir', type=Path,
+                       help='Directory for the output PDFs, named after their inputs')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                       help='Number of documents rendered in parallel (default: number of CPUs)')
+    parser.add_argument('--page-size', choices=['letter', 'a4'], default='letter',
+                       help='Page size (default: letter)')
+    parser.add_argument('--rules', type=str, default=None,
+                       help='Comma-separated list of rule names to apply (default: all)')
+    parser.add_argument('--modes', type=str, default=None,
+                       help='Comma-separated list of mode names to enable (default: all)')
+    parser.add_argument('--show-baselines', action='store_true',
+                       help='Show baseline guides')
+    parser.add_argument('--beginner', action='store_true',
+                       help='Show original text word under each shorthand word')
+    parser.add_argument('--scale', type=float, default=0.33,
+                       help='Size multiplier for glyphs (default: 0.33, use 1.0 for original large size)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_TOKEN_CACHE_SIZE,
+                       help=f'Number of distinct words to keep in each worker\'s tokenization cache '
+                            f'(default: {DEFAULT_TOKEN_CACHE_SIZE}, 0 to disable)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Read and render each input paragraph by paragraph')
+    parser.add_argument('--backend', choices=['matplotlib', 'native'], default='matplotlib',
+                       help='PDF output engine (default: matplotlib)')
+    parser.add_argument('--collect-strokes', action='store_true',
+                       help='Draw all strokes and dots of a page as one collection each '
+                            '(matplotlib backend)')
+    parser.add_argument('--summary-json', type=Path, default=None,
+                       help='Also write the per-file summary to this JSON file')
+
+    args = parser.parse_args()
+
+    if args.backend == 'native' and args.beginner:
+        parser.error('--beginner requires --backend matplotlib')
+
+    if not args.system_folder.is_dir():
+        print(f"Error: System folder not found: {args.system_folder}", file=sys.stderr)
+        sys.exit(1)
+
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        print("Error: No input files found", file=sys.stderr)
+        sys.exit(1)
+
+    # Outputs are named after their inputs, so the names must not collide
+    outputs = [args.output_dir / f'{input_file.stem}.pdf' for input_file in inputs]
+    duplicates = sorted(output.name for output, count in Counter(outputs).items() if count > 1)
+    if duplicates:
+        print(f"Error: Several inputs map to the same output: {', '.join(duplicates)}",
+              file=sys.stderr)
+        sys.exit(1)
+
+    # Load system once for the whole batch
+    try:
+        system = compile_system(load_system(args.system_folder), args.cache_size)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in system files: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    options = {
+        'active_rules': [r.strip() for r in args.rules.split(',')] if args.rules else None,
+        'active_modes': [m.strip() for m in args.modes.split(',')] if args.modes else None,
+        'stream': args.stream,
+        'page_size': args.page_size,
+        'show_baselines': args.show_baselines,
+        'beginner_mode': args.beginner,
+        'scale': args.scale,
+        'backend': args.backend,
+        'collect_strokes': args.collect_strokes,
+    }
+
+    start = time.perf_counter()
+    results = {}
+    if args.jobs <= 1:
+        init_worker(system)
+        for input_file, output_path in zip(inputs, outputs):
+            results[input_file] = render_document(input_file, output_path, options)
+            print(f"{'done' if results[input_file]['ok'] else 'FAILED'}: {input_file}")
+    else:
+        for result in render_parallel(system, list(zip(inputs, outputs)), options, args.jobs):
+            input_file = Path(result['input'])
+            results[input_file] = result
+            print(f"{'done' if result['ok'] else 'FAILED'}: {input_file}")
+
+    # Summary in input order
+    summary = [results[input_file] for input_file in inputs]
+    failed = [result for result in summary if not result['ok']]
+    print(f"\n{'status':<7} {'time':>9}  file")
+    for result in summary:
+        seconds = f"{result['seconds']:.2f}s" if result['seconds'] is not None else '-'
+        if result['ok']:
+            print(f"{'ok':<7} {seconds:>9}  {result['input']} -> {result['output']}")
+        else:
+            print(f"{'FAILED':<7} {seconds:>9}  {result['input']}: {result['error']}")
+    print(f"\n{len(summary) - len(failed)} of {len(summary)} documents rendered "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    if args.summary_json:
+        with open(args.summary_json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
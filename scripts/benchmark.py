@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Shorthand Pipeline Benchmarks
+
+Times every stage of generate_pdf.py (loading a system, processing text,
+tokenizing, merging splines, layout and rendering) on the bundled systems and
+records wall time and peak memory for each. Results can be saved as a baseline
+and later runs compared against it, failing on regressions.
+
+Usage:
+    python benchmark.py [--systems orthic,dance,flow] [--sizes 1k,10k] [--large]
+
+Example:
+    python scripts/benchmark.py --sizes 1k,100k --save-baseline benchmark-baseline.json
+    python scripts/benchmark.py --sizes 1k,100k --baseline benchmark-baseline.json
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from generate_pdf import (
+    compile_system,
+    find_multi_word_tokens,
+    layout_pages,
+    load_system,
+    merge_words,
+    normalize_text,
+    page_settings,
+    process_text,
+    render_pages_native,
+    render_pages_to_pdf,
+    tokenize_parallel,
+    tokenize_with_phrases,
+)
+
+SYSTEMS_FOLDER = Path(__file__).resolve().parent.parent / 'static' / 'data' / 'systems'
+
+# Corpus sizes in words added by --large
+LARGE_SIZES = [100_000, 1_000_000]
+
+# Fixed corpus, repeated to the requested size (opening of A Tale of Two Cities)
+FIXED_TEXT = """\
+It was the best of times, it was the worst of times, it was the age of wisdom, it was
+the age of foolishness, it was the epoch of belief, it was the epoch of incredulity, it
+was the season of Light, it was the season of Darkness, it was the spring of hope, it
+was the winter of despair, we had everything before us, we had nothing before us, we
+were all going direct to Heaven, we were all going direct the other way - in short, the
+period was so far like the present period, that some of its noisiest authorities
+insisted on its being received, for good or for evil, in the superlative degree of
+comparison only.
+
+There were a king with a large jaw and a queen with a plain face, on the throne of
+England; there were a king with a large jaw and a queen with a fair face, on the throne
+of France. In both countries it was clearer than crystal to the lords of the State
+preserves of loaves and fishes, that things in general were settled for ever.
+
+It was the year of Our Lord one thousand seven hundred and seventy-five. Spiritual
+revelations were conceded to England at that favoured period, as at this. Mrs.
+Southcott had recently attained her five-and-twentieth blessed birthday, of whom a
+prophetic private in the Life Guards had heralded the sublime appearance by announcing
+that arrangements were made for the swallowing up of London and Westminster.
+"""
+
+# English letter frequencies (percent) for synthetic words
+LETTER_FREQUENCIES = {
+    'e': 12.7, 't': 9.1, 'a': 8.2, 'o': 7.5, 'i': 7.0, 'n': 6.7, 's': 6.3, 'h': 6.1,
+    'r': 6.0, 'd': 4.3, 'l': 4.0, 'c': 2.8, 'u': 2.8, 'm': 2.4, 'w': 2.4, 'f': 2.2,
+    'g': 2.0, 'y': 2.0, 'p': 1.9, 'b': 1.5, 'v': 1.0, 'k': 0.8, 'j': 0.2, 'x': 0.2,
+    'q': 0.1, 'z': 0.1,
+}
+
+# Timings shorter than this are too noisy to flag as regressions
+MIN_COMPARED_SECONDS = 0.01
+
+
+def parse_size(size: str) -> int:
+    """Parse a word count such as '1000', '100k' or '1m'."""
+    size = size.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(size[-1:], 1)
+    if multiplier != 1:
+        size = size[:-1]
+    return int(float(size) * multiplier)
+
+
+def fixed_corpus(num_words: int) -> str:
+    """Return the first `num_words` words of `FIXED_TEXT` repeated, keeping paragraph breaks."""
+    paragraphs = [paragraph.split() for paragraph in FIXED_TEXT.split('\n\n')]
+    out = []
+    remaining = num_words
+    while remaining > 0:
+        for words in paragraphs:
+            out.append(' '.join(words[:remaining]))
+            remaining -= len(words)
+            if remaining <= 0:
+                break
+    return '\n\n'.join(out)
+
+
+def synthetic_corpus(num_words: int, seed: int = 0) -> str:
+    """
+    Return `num_words` random words with English letter frequencies.
+
+    Unlike the fixed corpus almost every word is new, so it measures the
+    tokenizer with a cold cache. The same seed always gives the same text.
+    """
+    rng = random.Random(seed)
+    letters = list(LETTER_FREQUENCIES)
+    weights = list(LETTER_FREQUENCIES.values())
+    paragraphs = []
+    sentences = []
+    words = []
+    for i in range(num_words):
+        words.append(''.join(rng.choices(letters, weights, k=rng.randint(1, 10))))
+        if len(words) >= rng.randint(5, 20) or i == num_words - 1:
+            sentences.append(' '.join(words).capitalize() + rng.choice('...,;?!'))
+            words = []
+            if len(sentences) >= rng.randint(3, 8) or i == num_words - 1:
+                paragraphs.append(' '.join(sentences))
+                sentences = []
+    return '\n\n'.join(paragraphs)
+
+
+CORPORA = {
+    'fixed': fixed_corpus,
+    'synthetic': synthetic_corpus,
+}
+
+
+def measure(fn, repeat: int, track_memory: bool) -> tuple[float, int | None, object]:
+    """
+    Run `fn` `repeat` times and return (best wall time, peak memory, result).
+
+    Peak memory is the most memory allocated on top of what was already in use
+    when `fn` started, measured with tracemalloc in one extra run so that
+    tracing does not slow down the timed runs.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if track_memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            result = fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peak -= baseline
+        finally:
+            tracemalloc.stop()
+    return best, peak, result
+
+
+def benchmark_system(system_name: str, sizes: list[int], corpora: list[str], repeat: int,
+                     track_memory: bool, render_limit: int, backend: str, jobs: int = 1):
+    """
+    Yield a result dict for every stage of the pipeline on one system. With
+    `jobs` > 1, parallel tokenization is timed as well; its peak memory only
+    covers the parent process.
+    """
+    system_folder = SYSTEMS_FOLDER / system_name
+
+    def record(stage, corpus, num_words, seconds, peak):
+        return {'system': system_name, 'corpus': corpus, 'words': num_words,
+                'stage': stage, 'seconds': seconds, 'peak_bytes': peak}
+
+    seconds, peak, system = measure(lambda: load_system(system_folder, use_cache=False),
+                                    repeat, track_memory)
+    yield record('load_system', '-', 0, seconds, peak)
+
+    # Warm the binary cache before timing the cached load
+    load_system(system_folder)
+    seconds, peak, system = measure(lambda: load_system(system_folder), repeat, track_memory)
+    yield record('load_system (cached)', '-', 0, seconds, peak)
+
+    seconds, peak, _ = measure(lambda: compile_system(system), repeat, track_memory)
+    yield record('compile_system', '-', 0, seconds, peak)
+
+    settings = page_settings()
+    compiled_system = compile_system(system)
+    for corpus in corpora:
+        for num_words in sizes:
+            text = CORPORA[corpus](num_words)
+
+            seconds, peak, processed = measure(lambda: process_text(text, compiled_system),
+                                               repeat, track_memory)
+            yield record('process_text', corpus, num_words, seconds, peak)
+            processed_text, multi_word_matches = processed
+
+            normalized_text = normalize_text(text)
+            seconds, peak, _ = measure(
+                lambda: find_multi_word_tokens(normalized_text, compiled_system['phrases'],
+                                               compiled_system.phrase_index),
+                repeat, track_memory
+            )
+            yield record('find_multi_word_tokens', corpus, num_words, seconds, peak)
+
+            # Each run gets a fresh compiled system so the token cache starts cold
+            compiled = [compile_system(system) for _ in range(repeat + track_memory)]
+            seconds, peak, tokenized = measure(
+                lambda: tokenize_with_phrases(processed_text, compiled.pop(), None,
+                                              multi_word_matches),
+                repeat, track_memory
+            )
+            yield record('tokenize_with_phrases', corpus, num_words, seconds, peak)
+            tokens, original_words = tokenized
+
+            seconds, peak, merged = measure(lambda: merge_words(tokens, original_words),
+                                            repeat, track_memory)
+            yield record('merge_words', corpus, num_words, seconds, peak)
+
+            if jobs > 1:
+                compiled = [compile_system(system) for _ in range(repeat + track_memory)]
+                seconds, peak, _ = measure(
+                    lambda: tokenize_parallel(processed_text, compiled.pop(), None,
+                                              multi_word_matches, jobs),
+                    repeat, track_memory
+                )
+                yield record(f'tokenize_parallel ({jobs})', corpus, num_words, seconds, peak)
+
+            def layout():
+                # Word bounds are cached on the words, so every run starts without them
+                merged.bounds = None
+                return list(layout_pages([merged], settings))
+
+            seconds, peak, pages = measure(layout, repeat, track_memory)
+            yield record('layout', corpus, num_words, seconds, peak)
+
+            if num_words > render_limit:
+                continue
+            with tempfile.TemporaryDirectory() as tmp:
+                output_path = Path(tmp) / 'benchmark.pdf'
+                if backend == 'native':
+                    render = lambda: render_pages_native(pages, output_path, settings)  # noqa: E731
+                else:
+                    render = lambda: render_pages_to_pdf(pages, output_path, settings)  # noqa: E731
+                seconds, peak, _ = measure(render, repeat, track_memory)
+            yield record('render', corpus, num_words, seconds, peak)
+
+
+def result_key(result: dict) -> tuple:
+    return result['system'], result['corpus'], result['words'], result['stage']
+
+
+def format_bytes(num_bytes: int | None) -> str:
+    if num_bytes is None:
+        return '-'
+    for unit in ['B', 'KiB', 'MiB']:
+        if abs(num_bytes) < 1024:
+            return f'{num_bytes:.0f} {unit}'
+        num_bytes /= 1024
+    return f'{num_bytes:.1f} GiB'
+
+
+def find_regressions(results: list, baseline: list, tolerance: float) -> list[str]:
+    """Compare results with a baseline, returning a message for each regression."""
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        name = '{system} / {corpus} / {words} words / {stage}'.format(**result)
+
+        if (result['seconds'] >= MIN_COMPARED_SECONDS
+                and result['seconds'] > before['seconds'] * (1 + tolerance)):
+            regressions.append(f"{name}: {result['seconds']:.4f}s "
+                               f"(baseline {before['seconds']:.4f}s)")
+
+        if (result['peak_bytes'] is not None and before['peak_bytes'] is not None
+                and result['peak_bytes'] > before['peak_bytes'] * (1 + tolerance)):
+            regressions.append(f"{name}: {format_bytes(result['peak_bytes'])} peak "
+                               f"(baseline {format_bytes(before['peak_bytes'])})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark every stage of the PDF pipeline on the bundled systems',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    python scripts/benchmark.py
+    python scripts/benchmark.py --systems orthic --sizes 1k,100k --corpora fixed
+    python scripts/benchmark.py --large
+    python scripts/benchmark.py --systems orthic --sizes 1m --jobs 16
+    python scripts/benchmark.py --save-baseline benchmark-baseline.json
+    python scripts/benchmark.py --baseline benchmark-baseline.json --tolerance 0.2
+        '''
+    )
+
+    parser.add_argument('--systems', type=str, default='orthic,dance,flow',
+                       help='Comma-separated list of bundled systems (default: orthic,dance,flow)')
+    parser.add_argument('--sizes', type=str, default='1k,10k',
+                       help='Comma-separated corpus sizes in words (default: 1k,10k)')
+    parser.add_argument('--large', action='store_true',
+                       help='Also run the 100k and 1m word corpora, which take minutes per system')
+    parser.add_argument('--corpora', type=str, default='fixed,synthetic',
+                       help='Comma-separated corpora to run: fixed, synthetic (default: both)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Timed runs per stage; the fastest is reported (default: 3)')
+    parser.add_argument('--no-memory', action='store_true',
+                       help='Skip the extra traced run that measures peak memory')
+    parser.add_argument('--render-limit', type=parse_size, default=1000,
+                       help='Largest corpus that is also rendered, since rendering dominates '
+                            'the run time (default: 1k words)')
+    parser.add_argument('--backend', choices=['matplotlib', 'native'], default='matplotlib',
+                       help='PDF engine used for the render stage (default: matplotlib)')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Also time tokenizing and merging in this many worker processes '
+                            '(default: 1, off)')
+    parser.add_argument('--output', type=Path, default=None,
+                       help='Write the results to this JSON file')
+    parser.add_argument('--baseline', type=Path, default=None,
+                       help='Compare against a saved baseline and exit with an error on regressions')
+    parser.add_argument('--save-baseline', type=Path, default=None,
+                       help='Save the results as a new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                       help='Allowed slowdown or memory growth over the baseline (default: 0.25)')
+
+    args = parser.parse_args()
+
+    systems = [s.strip() for s in args.systems.split(',')]
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    if args.large:
+        sizes += [size for size in LARGE_SIZES if size not in sizes]
+    corpora = [c.strip() for c in args.corpora.split(',')]
+
+    for system_name in systems:
+        if not (SYSTEMS_FOLDER / system_name).is_dir():
+            parser.error(f'unknown system: {system_name}')
+    for corpus in corpora:
+        if corpus not in CORPORA:
+            parser.error(f'unknown corpus: {corpus}')
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            print(f"Error: Could not read baseline {args.baseline}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    print(f"{'system':<8} {'corpus':<10} {'words':>8}  {'stage':<22} {'time':>10} {'peak':>11}")
+    results = []
+    for system_name in systems:
+        for result in benchmark_system(system_name, sizes, corpora, args.repeat,
+                                       not args.no_memory, args.render_limit, args.backend,
+                                       args.jobs):
+            results.append(result)
+            print(f"{result['system']:<8} {result['corpus']:<10} {result['words']:>8}  "
+                  f"{result['stage']:<22} {result['seconds']:>9.4f}s "
+                  f"{format_bytes(result['peak_bytes']):>11}", flush=True)
+
+    report = {
+        'python': sys.version.split()[0],
+        'repeat': args.repeat,
+        'backend': args.backend,
+        'jobs': args.jobs,
+        'results': results,
+    }
+    for path in [args.output, args.save_baseline]:
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Results saved to: {path}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
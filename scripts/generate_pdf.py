@@ -14,67 +14,681 @@ Example:
 """
 
 import argparse
+import bisect
+import hashlib
+import io
 import json
+import os
 import re
 import sys
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache, partial
 from pathlib import Path
+from xml.sax.saxutils import escape
 
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.backends.backend_pdf import PdfPages
-from scipy.interpolate import CubicSpline
 
+# matplotlib and SciPy are imported where they are first used, so that
+# tokenizing and the native backend start without loading the plotting stack
 
-def load_system(system_folder: Path) -> dict:
-    """Load all 4 JSON files from a system folder."""
-    system = {}
+# Default number of distinct words kept in a system's tokenization cache
+DEFAULT_TOKEN_CACHE_SIZE = 10000
+
+# Characters of a paragraph buffered in streaming mode before it is cut at whitespace
+STREAM_CHUNK_CHARS = 65536
+
+# Characters of processed text per slice handed to a worker by parallel tokenization
+TOKENIZE_SLICE_CHARS = 131072
+
+# Phrases up to which PhraseIndex matches with one regex alternation, which
+# beats walking the trie from every candidate start until there are hundreds
+PHRASE_REGEX_LIMIT = 256
+
+# Words on each side of a chunk boundary checked for phrases and rules spanning it
+STREAM_CONTEXT_WORDS = 8
+
+# JSON files making up a system folder
+SYSTEM_FILES = ['glyphs.json', 'modes.json', 'rules.json', 'phrases.json']
+
+# Binary system cache written next to the JSON files, and its format version
+SYSTEM_CACHE_NAME = '.system-cache.npz'
+SYSTEM_CACHE_VERSION = 1
+
+# Cache folder of incremental renders, kept next to the output by default,
+# and its format version (part of every key, so bumping it starts over)
+RENDER_CACHE_NAME = '.render-cache'
+RENDER_CACHE_VERSION = 1
+
+# Profiled stages, in pipeline order
+PROFILE_STAGES = ['load', 'preprocess', 'phrase match', 'rules', 'tokenize', 'merge',
+                  'layout', 'render', 'save']
+
+
+class Profiler:
+    """
+    Per-stage wall times and event counters for one run of the pipeline.
 
-    required_files = ['glyphs.json', 'modes.json', 'rules.json', 'phrases.json']
+    Stages are exclusive: entering a stage pauses the one it is nested in, so
+    when lazy stages pull from each other (layout pulling tokenized words in
+    streaming mode, rendering pulling laid out pages) each moment is charged
+    to exactly one stage. Times accumulate over every entry of a stage.
 
-    for filename in required_files:
+    A disabled profiler hands out a shared no-op context and passes iterables
+    through untouched, so hooks cost next to nothing when profiling is off.
+    Counters on hot paths are only recorded behind ``profiler.enabled``.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {name: 0.0 for name in PROFILE_STAGES}
+        self.counters = {}
+        self.page_points = []
+        self._stack = []
+        self._started = None
+        self._created = time.perf_counter()
+
+    def enable(self) -> None:
+        """Start profiling, with the total wall time counted from now."""
+        self.enabled = True
+        self._created = time.perf_counter()
+
+    def stage(self, name: str):
+        """Return a context manager charging the time spent inside it to `name`."""
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name: str):
+        now = time.perf_counter()
+        if self._stack:
+            self._charge(now)
+        self._stack.append(name)
+        self._started = now
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._charge(now)
+            self._stack.pop()
+            self._started = now
+
+    def _charge(self, now: float) -> None:
+        name = self._stack[-1]
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._started
+
+    def timed(self, name: str, iterable):
+        """Charge the time spent producing each item of `iterable` to `name`."""
+        if not self.enabled:
+            return iterable
+        return self._timed(name, iter(iterable))
+
+    def _timed(self, name: str, iterator):
+        done = object()
+        while True:
+            with self._stage(name):
+                item = next(iterator, done)
+            if item is done:
+                return
+            yield item
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add `amount` to a counter."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def counted_pages(self, pages):
+        """Pass pages from `layout_pages` through, counting their strokes and points."""
+        for page in pages:
+            stroke_lengths = np.diff(page['words'].stroke_offsets)
+            strokes = int(np.count_nonzero(stroke_lengths > 1))
+            points = int(stroke_lengths[stroke_lengths > 1].sum())
+            self.count('pages written')
+            self.count('strokes drawn', strokes)
+            self.count('stroke points', points)
+            self.page_points.append(points)
+            yield page
+
+    def report(self) -> dict:
+        """Return the timings and counters as a JSON-serializable dict."""
+        total = time.perf_counter() - self._created
+        return {
+            'total_seconds': total,
+            'stages': dict(self.stages),
+            'unprofiled_seconds': max(total - sum(self.stages.values()), 0.0),
+            'counters': dict(self.counters),
+            'points_per_page': list(self.page_points),
+        }
+
+    def print_report(self, file=sys.stderr) -> None:
+        """Print a table of stage times and counters."""
+        report = self.report()
+        total = report['total_seconds']
+        print(f"Profile ({total:.3f}s total):", file=file)
+        rows = list(report['stages'].items()) + [('other', report['unprofiled_seconds'])]
+        for name, seconds in rows:
+            share = 100 * seconds / total if total else 0.0
+            print(f"  {name:<14} {seconds:>9.3f}s {share:>5.1f}%", file=file)
+        for name, value in report['counters'].items():
+            print(f"  {name:<24} {value:>10}", file=file)
+        if self.page_points:
+            mean = sum(self.page_points) / len(self.page_points)
+            print(f"  {'points per page':<24} {mean:>10.1f} mean, {max(self.page_points)} max",
+                  file=file)
+
+
+# Profiler used by the pipeline; disabled unless --profile is given
+profiler = Profiler()
+
+
+def load_system(system_folder: Path, use_cache: bool = True) -> dict:
+    """
+    Load all 4 JSON files from a system folder.
+
+    If `use_cache` is set, the system is read from its binary cache (see
+    `write_system_cache`) when that cache matches the JSON files' content
+    hash, and the cache is (re)written otherwise, if the folder is writable.
+    """
+    contents = {}
+    for filename in SYSTEM_FILES:
         filepath = system_folder / filename
         if not filepath.exists():
             raise FileNotFoundError(f"Required file not found: {filepath}")
+        contents[filename] = filepath.read_bytes()
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            key = filename.replace('.json', '')
-            system[key] = json.load(f)
+    digest = system_digest(contents)
+    if use_cache:
+        system = read_system_cache(system_folder, digest)
+        if system is not None:
+            return system
+
+    system = {}
+    for filename, data in contents.items():
+        key = filename.replace('.json', '')
+        system[key] = json.loads(data.decode('utf-8'))
+
+    if use_cache:
+        try:
+            write_system_cache(system_folder, system, digest)
+        except (OSError, ValueError, TypeError):
+            # Read-only folder or geometry that is not a list of [x, y] points
+            pass
 
     return system
 
 
+def system_digest(contents: dict) -> str:
+    """Return the content hash of a system's JSON files, given {filename: bytes}."""
+    digest = hashlib.sha256(b'%d' % SYSTEM_CACHE_VERSION)
+    for filename in SYSTEM_FILES:
+        digest.update(filename.encode('utf-8') + b'\0' + contents[filename] + b'\0')
+    return digest.hexdigest()
+
+
+def pack_shapes(shapes: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack a list of shapes (each a list of strokes of [x, y] points) into flat arrays.
+
+    Returns (points, stroke_offsets, shape_offsets): all points as one (N, 2)
+    float array, where stroke i spans points[stroke_offsets[i]:stroke_offsets[i + 1]]
+    and shape j spans strokes shape_offsets[j] to shape_offsets[j + 1].
+    """
+    strokes = [stroke for shape in shapes for stroke in shape]
+    stroke_lengths = [len(stroke) for stroke in strokes]
+    points = np.array([point for stroke in strokes for point in stroke], dtype=float).reshape(-1, 2)
+    stroke_offsets = np.concatenate([[0], np.cumsum(stroke_lengths, dtype=np.int64)])
+    shape_offsets = np.concatenate([[0], np.cumsum([len(shape) for shape in shapes], dtype=np.int64)])
+    return points, stroke_offsets, shape_offsets
+
+
+def unpack_shapes(points: np.ndarray, stroke_offsets: np.ndarray, shape_offsets: np.ndarray) -> list:
+    """Rebuild the nested point lists packed by `pack_shapes`."""
+    point_lists = points.tolist()
+    bounds = stroke_offsets.tolist()
+    strokes = [point_lists[start:end] for start, end in zip(bounds, bounds[1:])]
+    shape_bounds = shape_offsets.tolist()
+    return [strokes[start:end] for start, end in zip(shape_bounds, shape_bounds[1:])]
+
+
+def float_numbers(value):
+    """Return a copy of nested dicts and lists with every integer turned into a float."""
+    if isinstance(value, dict):
+        return {key: float_numbers(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [float_numbers(item) for item in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def ragged_indices(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Return the concatenation of arange(start, start + length) for each range."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    range_offsets = np.cumsum(lengths) - lengths
+    return (np.repeat(np.asarray(starts, dtype=np.int64) - range_offsets, lengths)
+            + np.arange(total, dtype=np.int64))
+
+
+def write_system_cache(system_folder: Path, system: dict, digest: str) -> Path:
+    """
+    Write the compact binary form of a system next to its JSON files.
+
+    The glyph, mode and phrase geometry of the system is packed with
+    `pack_shapes` into one set of flat arrays; names, patterns and rules are
+    stored as a small JSON document alongside it, together with the content
+    hash the cache is valid for.
+    """
+    glyph_names = list(system['glyphs'])
+    mode_names = list(system['modes'])
+    phrase_names = list(system['phrases'])
+    shapes = ([system['glyphs'][name] for name in glyph_names]
+              + [system['modes'][name]['points'] for name in mode_names]
+              + [system['phrases'][name] for name in phrase_names])
+    points, stroke_offsets, shape_offsets = pack_shapes(shapes)
+
+    meta = {
+        'digest': digest,
+        'glyphs': glyph_names,
+        'modes': [[name, {k: v for k, v in system['modes'][name].items() if k != 'points'}]
+                  for name in mode_names],
+        'phrases': phrase_names,
+        'rules': system['rules'],
+    }
+
+    cache_path = system_folder / SYSTEM_CACHE_NAME
+    # Named per process, since workers may load the same system at once
+    temp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+    with open(temp_path, 'wb') as f:
+        np.savez(f, points=points, stroke_offsets=stroke_offsets,
+                 shape_offsets=shape_offsets, meta=np.array(json.dumps(meta)))
+    temp_path.replace(cache_path)
+    return cache_path
+
+
+def read_system_cache(system_folder: Path, digest: str) -> dict | None:
+    """Load a system from its binary cache, or return None if it is missing or stale."""
+    cache_path = system_folder / SYSTEM_CACHE_NAME
+    try:
+        with np.load(cache_path) as cache:
+            meta = json.loads(str(cache['meta']))
+            if meta['digest'] != digest:
+                return None
+            shapes = unpack_shapes(cache['points'], cache['stroke_offsets'], cache['shape_offsets'])
+    except Exception:
+        # A truncated or damaged cache file is a miss like any other
+        return None
+
+    glyph_count = len(meta['glyphs'])
+    mode_count = len(meta['modes'])
+    return {
+        'glyphs': dict(zip(meta['glyphs'], shapes[:glyph_count])),
+        'modes': {name: {**mode, 'points': points} for (name, mode), points
+                  in zip(meta['modes'], shapes[glyph_count:glyph_count + mode_count])},
+        'rules': meta['rules'],
+        'phrases': dict(zip(meta['phrases'], shapes[glyph_count + mode_count:])),
+    }
+
+
+class TokenCache:
+    """
+    Bounded LRU memo of word tokenizations.
+
+    Natural text repeats a small vocabulary, so most words are tokenized once
+    and then served from here. `hits` and `misses` count lookups; a `maxsize`
+    of 0 disables caching. Cached token lists are shared and must not be
+    modified.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached tokens for `key`, or None on a miss."""
+        tokens = self._entries.get(key)
+        if tokens is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return tokens
+
+    def put(self, key, tokens: list) -> None:
+        """Cache `tokens` under `key`, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = tokens
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class CompiledSystem:
+    """
+    A shorthand system with all of its regexes compiled once.
+
+    Wraps the dict returned by `load_system` and precompiles the mode matchers,
+    the glyph trie, the rules and the phrase index so that processing and
+    tokenization do no per-word setup. Item access (``system['glyphs']``) is
+    forwarded to the underlying dict, so a CompiledSystem can be used anywhere
+    a plain system dict is expected.
+
+    Each compiled system owns a `TokenCache` of up to `cache_size` words, keyed
+    by (word, active mode set), used by `tokenize`.
+    """
+
+    def __init__(self, system: dict, cache_size: int = DEFAULT_TOKEN_CACHE_SIZE):
+        self.data = system
+        self.token_cache = TokenCache(cache_size)
+
+        # Modes keep their definition order; invalid patterns are skipped
+        self.mode_matchers = []
+        for mode_name, mode_data in system['modes'].items():
+            try:
+                pattern = re.compile(mode_data['pattern'])
+            except re.error:
+                continue
+            self.mode_matchers.append((mode_name, pattern, mode_data['points']))
+
+        # Glyph names are literals, so they are matched with a prefix trie
+        self.glyph_trie = build_glyph_trie(system['glyphs'])
+
+        # Rules as (name, compiled regex or None, Python replacement, compile error).
+        # Replacements are written for JavaScript's String.replace and are
+        # translated to Python templates once here.
+        self.rules = []
+        for rule in system['rules']:
+            try:
+                regex = re.compile(rule['regex'])
+                replacement = translate_replacement(rule['replacement'], regex)
+                self.rules.append((rule['name'], regex, replacement, None))
+            except re.error as e:
+                self.rules.append((rule['name'], None, rule['replacement'], e))
+
+        self.phrase_index = PhraseIndex(system['phrases'])
+
+        # Active mode matchers, keyed by the active mode set
+        self._active_modes = {}
+
+        # Rule chains, keyed by the active rule set
+        self._rule_chains = {}
+
+        self._digest = None
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def digest(self) -> str:
+        """Return a content hash of the system, for keying cached output made with it."""
+        if self._digest is None:
+            # Glyphs, modes and rules keep their order, since it matters. A
+            # system read back from its binary cache has float geometry where
+            # the JSON files had integers, and the points of each mode last,
+            # so numbers are hashed as floats and mode fields in sorted order.
+            modes = {name: dict(sorted(mode.items())) for name, mode in self.data['modes'].items()}
+            canonical = float_numbers({**self.data, 'modes': modes})
+            data = json.dumps(canonical, ensure_ascii=False).encode('utf-8')
+            self._digest = hashlib.sha256(data).hexdigest()
+        return self._digest
+
+    def active_mode_matchers(self, active_modes: list[str] | None = None) -> list:
+        """Return (pattern, points) for each active mode, in definition order."""
+        key = None if active_modes is None else frozenset(active_modes)
+        matchers = self._active_modes.get(key)
+        if matchers is None:
+            matchers = [(pattern, points) for mode_name, pattern, points in self.mode_matchers
+                        if key is None or mode_name in key]
+            self._active_modes[key] = matchers
+        return matchers
+
+    def rule_chain(self, active_rules: list[str] | None = None) -> list:
+        """
+        Return (regex, replacement) for each active rule, in definition order.
+
+        Rules whose regex failed to compile are left out of the chain, with a
+        warning printed the first time a chain containing them is built.
+        """
+        key = None if active_rules is None else frozenset(active_rules)
+        chain = self._rule_chains.get(key)
+        if chain is None:
+            chain = []
+            for name, regex, replacement, error in self.rules:
+                if key is not None and name not in key:
+                    continue
+                if error is not None:
+                    print(f"Warning: Invalid regex in rule '{name}': {error}", file=sys.stderr)
+                    continue
+                chain.append((regex, replacement))
+            self._rule_chains[key] = chain
+        return chain
+
+    def tokenize(self, word: str, active_modes: list[str] | None = None) -> list:
+        """Tokenize a word with `tokenize_string`, going through the token cache."""
+        key = (word, None if active_modes is None else frozenset(active_modes))
+        tokens = self.token_cache.get(key)
+        if tokens is None:
+            tokens = tokenize_string(word, self, active_modes)
+            self.token_cache.put(key, tokens)
+        return tokens
+
+
+def compile_system(system, cache_size: int = DEFAULT_TOKEN_CACHE_SIZE) -> CompiledSystem:
+    """Compile a system dict, passing an already compiled system through unchanged."""
+    if isinstance(system, CompiledSystem):
+        return system
+    return CompiledSystem(system, cache_size)
+
+
+# Apostrophes are dropped and /, \, - become spaces
+NORMALIZE_TABLE = str.maketrans({"'": None, '/': ' ', '\\': ' ', '-': ' '})
+
+PUNCTUATION_PATTERN = re.compile(r'([\d!"#$%&\'()*+,-./:;<=>?@\[\\\]^_`{|}~])')
+
+# A $-token in a JavaScript replacement string
+JS_REPLACEMENT_TOKEN = re.compile(r"\$(?:(\$)|(&)|(`)|(')|(\d\d?)|<([^>]*)>)")
+
+# A § in processed text that is part of a longer word rather than a phrase
+# placeholder, and the whitespace between words
+EMBEDDED_PLACEHOLDER = re.compile(r'§(?:(?=\S)|(?<=\S§))')
+WHITESPACE = re.compile(r'\s')
+
+
+def translate_replacement(replacement: str, regex: re.Pattern):
+    """
+    Translate a JavaScript String.replace replacement into a Python one.
+
+    Handles ``$$``, ``$&``, ``$n``/``$nn`` (resolved against the groups of
+    `regex` the way JavaScript does, so ``$10`` is group 10 if it exists and
+    group 1 followed by ``0`` otherwise), ``$<name>``, ``$` `` and ``$'``;
+    anything else is kept literally. Returns an ``re.sub`` template string, or
+    a function of the match when the replacement uses ``$` `` or ``$'``, which
+    templates cannot express.
+    """
+    # Pieces as ('literal', text), ('group', number or name), ('before',) or ('after',)
+    pieces = []
+    position = 0
+    for token in JS_REPLACEMENT_TOKEN.finditer(replacement):
+        pieces.append(('literal', replacement[position:token.start()]))
+        position = token.end()
+        dollar, whole, before, after, digits, name = token.groups()
+        if dollar:
+            pieces.append(('literal', '$'))
+        elif whole:
+            pieces.append(('group', 0))
+        elif before:
+            pieces.append(('before',))
+        elif after:
+            pieces.append(('after',))
+        elif digits:
+            if len(digits) == 2 and 1 <= int(digits) <= regex.groups:
+                pieces.append(('group', int(digits)))
+            elif 1 <= int(digits[0]) <= regex.groups:
+                pieces.append(('group', int(digits[0])))
+                pieces.append(('literal', digits[1:]))
+            else:
+                pieces.append(('literal', token.group()))
+        elif not regex.groupindex:
+            pieces.append(('literal', token.group()))
+        elif name in regex.groupindex:
+            pieces.append(('group', name))
+        # Unknown names are empty when the regex has named groups
+    pieces.append(('literal', replacement[position:]))
+
+    if any(piece[0] in ('before', 'after') for piece in pieces):
+        # A partial rather than a closure, so compiled systems stay picklable
+        return partial(expand_replacement, pieces)
+
+    return ''.join(value[0].replace('\\', '\\\\') if kind == 'literal' else f'\\g<{value[0]}>'
+                   for kind, *value in pieces)
+
+
+def expand_replacement(pieces: list, match: re.Match) -> str:
+    """Expand the pieces of a translated replacement for one match."""
+    out = []
+    for kind, *value in pieces:
+        if kind == 'literal':
+            out.append(value[0])
+        elif kind == 'group':
+            out.append(match.group(value[0]) or '')
+        elif kind == 'before':
+            out.append(match.string[:match.start()])
+        else:
+            out.append(match.string[match.end():])
+    return ''.join(out)
+
+
 def add_spaces_around_punctuation(text: str) -> str:
     """Add spaces around punctuation and digits."""
-    pattern = r'([\d!"#$%&\'()*+,-./:;<=>?@\[\\\]^_`{|}~])'
-    spaced_text = re.sub(pattern, r' \1 ', text)
+    spaced_text = PUNCTUATION_PATTERN.sub(r' \1 ', text)
     return spaced_text.strip()
 
 
-def find_multi_word_tokens(text: str, phrases: dict) -> tuple[str, list]:
-    """Find and extract multi-word tokens (phrases) from text."""
-    matches = []
+def normalize_text(text: str) -> str:
+    """
+    Normalize raw input text before phrase matching.
+
+    Collapses whitespace, lowercases, drops apostrophes, turns /, \\ and - into
+    spaces and adds spaces around punctuation and digits.
+    """
+    text = ' '.join(text.split()).lower().translate(NORMALIZE_TABLE)
+    return add_spaces_around_punctuation(text)
+
 
-    if not phrases:
-        return text, matches
+class PhraseIndex:
+    """
+    Word-boundary-aware prefix trie over phrase keys.
+
+    Finds phrases with the same semantics as the regex ``\\b(p1|p2|...)\\b``
+    with alternatives sorted longest first: scanning left to right, a phrase
+    may only start and end at a word boundary, the longest such phrase at a
+    position wins and scanning resumes after it. Up to PHRASE_REGEX_LIMIT
+    phrases, that regex itself is used, since it runs in C. With more, a regex
+    finds the word boundaries whose character starts some phrase, and each is
+    checked with a single trie walk, so the cost does not grow with the number
+    of phrases. Empty keys are ignored.
+    """
+
+    _boundary = re.compile(r'\b')
+
+    def __init__(self, phrases: dict):
+        self.trie = {}
+        keys = [phrase for phrase in phrases if phrase]
+        for phrase in keys:
+            node = self.trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[None] = phrase
+
+        self.regex = None
+        self.starts = None
+        if not keys:
+            return
+        if len(keys) <= PHRASE_REGEX_LIMIT:
+            alternatives = sorted(keys, key=len, reverse=True)
+            self.regex = re.compile(r'\b(' + '|'.join(map(re.escape, alternatives)) + r')\b')
+        else:
+            first_chars = ''.join(map(re.escape, sorted(self.trie)))
+            self.starts = re.compile(r'\b(?=[' + first_chars + '])')
+
+    def __bool__(self):
+        return bool(self.trie)
+
+    def match(self, text: str, start: int) -> str | None:
+        """Return the longest phrase at `start` that ends on a word boundary, if any."""
+        best = None
+        node = self.trie
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if None in node and self._boundary.match(text, i + 1):
+                best = node[None]
+        return best
+
+    def sub(self, text: str, placeholder: str = '§') -> tuple[str, list]:
+        """Replace every phrase in text with `placeholder`. Returns (new_text, matches)."""
+        matches = []
+        if not self.trie:
+            return text, matches
+        if self.regex is not None:
+            def replacement(match):
+                matches.append(match.group(0))
+                return placeholder
+
+            return self.regex.sub(replacement, text), matches
+
+        pieces = []
+        last = 0
+        for candidate in self.starts.finditer(text):
+            start = candidate.start()
+            if start < last:
+                continue
+            phrase = self.match(text, start)
+            if phrase is None:
+                continue
+            pieces.append(text[last:start])
+            pieces.append(placeholder)
+            matches.append(phrase)
+            last = start + len(phrase)
 
-    # Sort phrases by length (longest first) for greedy matching
-    sorted_phrases = sorted(phrases.keys(), key=len, reverse=True)
-    escaped_tokens = [re.escape(token) for token in sorted_phrases]
+        pieces.append(text[last:])
+        return ''.join(pieces), matches
 
-    if not escaped_tokens:
-        return text, matches
 
-    pattern = r'\b(' + '|'.join(escaped_tokens) + r')\b'
+def find_multi_word_tokens(text: str, phrases: dict, index: PhraseIndex | None = None) -> tuple[str, list]:
+    """
+    Find and extract multi-word tokens (phrases) from text.
 
-    def replacement(match):
-        matches.append(match.group(0))
-        return '§'
+    A prebuilt `PhraseIndex` may be passed to skip rebuilding it from `phrases`.
+    """
+    if index is None:
+        index = PhraseIndex(phrases)
+    if not index:
+        return text, []
 
-    new_text = re.sub(pattern, replacement, text)
-    return new_text, matches
+    return index.sub(text)
 
 
-def process_text(text: str, system: dict, active_rules: list[str] | None = None) -> tuple[str, list]:
+def process_text(text: str, system: dict | CompiledSystem,
+                 active_rules: list[str] | None = None) -> tuple[str, list]:
     """
     Process text through the transformation pipeline.
 
@@ -87,40 +701,195 @@ def process_text(text: str, system: dict, active_rules: list[str] | None = None)
     6. Find phrases and replace with § placeholder
     7. Apply rules (regex substitutions)
     """
-    # Normalize whitespace - treat all whitespace as single spaces
-    text = ' '.join(text.split())
+    system = compile_system(system)
 
-    # Convert to lowercase
-    text = text.lower()
+    # Steps 1-5 in one pass over a translate table and one regex
+    with profiler.stage('preprocess'):
+        text = normalize_text(text)
 
-    # Remove unsupported punctuation
-    text = text.replace("'", '')
+    # Find phrases and replace with placeholder
+    with profiler.stage('phrase match'):
+        text, multi_word_matches = find_multi_word_tokens(text, system['phrases'],
+                                                          system.phrase_index)
 
-    # Replace certain punctuation with spaces
-    for p in ['/', '\\', '-']:
-        text = text.replace(p, ' ')
+    # Apply rules
+    rule_chain = system.rule_chain(active_rules)
+    profiler.count('rule regex passes', len(rule_chain))
+    with profiler.stage('rules'):
+        for regex, replacement in rule_chain:
+            text = regex.sub(replacement, text)
 
-    # Add spaces around punctuation
-    text = add_spaces_around_punctuation(text)
+    return text, multi_word_matches
 
-    # Find phrases and replace with placeholder
-    text, multi_word_matches = find_multi_word_tokens(text, system['phrases'])
 
-    # Apply rules
-    if active_rules is None:
-        active_rules = [rule['name'] for rule in system['rules']]
+def build_glyph_trie(glyphs: dict) -> dict:
+    """
+    Build a prefix trie over glyph names.
 
-    for rule in system['rules']:
-        if rule['name'] not in active_rules:
+    Each node maps a character to its child node; a node that ends a glyph name
+    stores (definition index, points) under the `None` key. Empty glyph names
+    cannot be matched and are skipped.
+    """
+    root = {}
+    for index, (glyph_name, glyph_points) in enumerate(glyphs.items()):
+        if not glyph_name:
             continue
+        node = root
+        for char in glyph_name:
+            node = node.setdefault(char, {})
+        node[None] = (index, glyph_points)
+    return root
 
-        try:
-            regex = re.compile(rule['regex'])
-            text = regex.sub(rule['replacement'], text)
-        except re.error as e:
-            print(f"Warning: Invalid regex in rule '{rule['name']}': {e}", file=sys.stderr)
 
-    return text, multi_word_matches
+def match_glyphs(trie: dict, word: str, start: int) -> list:
+    """
+    Return (length, points) for every glyph matching `word` at `start`.
+
+    Matches are found in a single walk of the trie and returned in glyph
+    definition order, which is the order the tokenizer breaks ties in.
+    """
+    matches = []
+    node = trie
+    for i in range(start, len(word)):
+        node = node.get(word[i])
+        if node is None:
+            break
+        if None in node:
+            index, points = node[None]
+            matches.append((index, i + 1 - start, points))
+    matches.sort(key=lambda match: match[0])
+    return [(length, points) for _, length, points in matches]
+
+
+def build_mode_lattice(mode_matchers: list, word: str) -> list:
+    """
+    Find every mode match in a word in one scan per mode.
+
+    Returns a list with one entry per start offset, each holding (length, points)
+    for every mode that matches there, in mode definition order. Each mode is
+    searched forward from just past its previous hit, so overlapping matches are
+    found while positions with no match cost nothing extra. A match found by
+    `search` at an offset is the same match `pattern.match(word, offset)` gives,
+    lookarounds included, since both see the whole word.
+    """
+    lattice = [[] for _ in range(len(word))]
+    searches = 0
+    for pattern, points in mode_matchers:
+        pos = 0
+        while pos < len(word):
+            searches += 1
+            match = pattern.search(word, pos)
+            if match is None:
+                break
+            start = match.start()
+            if start >= len(word):
+                break
+            lattice[start].append((match.end() - start, points))
+            pos = start + 1
+    if profiler.enabled:
+        profiler.count('mode regex searches', searches)
+    return lattice
+
+
+def read_text_chunks(file, chunk_chars: int = STREAM_CHUNK_CHARS):
+    """
+    Yield the text of an open file paragraph by paragraph.
+
+    Paragraphs end at blank lines. A paragraph longer than `chunk_chars` is cut
+    at its last whitespace, so at most about two blocks of text are buffered.
+    """
+    paragraph_break = re.compile(r'\n[^\S\n]*\n')
+    buffer = ''
+
+    while True:
+        block = file.read(chunk_chars)
+        if not block:
+            break
+        buffer += block
+
+        # Emit every complete paragraph, keeping the unfinished one
+        parts = paragraph_break.split(buffer)
+        buffer = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part
+
+        if len(buffer) > chunk_chars:
+            cut = max(buffer.rfind(c) for c in ' \t\n\r\f\v')
+            if cut > 0:
+                yield buffer[:cut]
+                buffer = buffer[cut:]
+
+    if buffer.strip():
+        yield buffer
+
+
+def is_chunk_boundary_separable(left: str, right: str, system: CompiledSystem,
+                                active_rules: list[str] | None, context_words: int) -> bool:
+    """
+    Check whether two raw text chunks can be processed independently.
+
+    The last and first `context_words` words around the boundary are processed
+    both together and separately; the boundary is separable if both give the
+    same words and phrase matches, i.e. no phrase or rule match spans it.
+    """
+    tail = ' '.join(left.split()[-context_words:])
+    head = ' '.join(right.split()[:context_words])
+
+    joined_text, joined_matches = process_text(tail + ' ' + head, system, active_rules)
+    tail_text, tail_matches = process_text(tail, system, active_rules)
+    head_text, head_matches = process_text(head, system, active_rules)
+
+    return (joined_text.split() == tail_text.split() + head_text.split()
+            and joined_matches == tail_matches + head_matches)
+
+
+def join_chunks(chunks, system: dict | CompiledSystem, active_rules: list[str] | None = None,
+                context_words: int = STREAM_CONTEXT_WORDS, separable=is_chunk_boundary_separable):
+    """
+    Join a stream of raw text chunks into texts that can be processed on their own.
+
+    A chunk is only split from the next one if `separable` (with the signature
+    of `is_chunk_boundary_separable`) says no phrase or rule spans their
+    boundary; otherwise the two are joined with a space. Blank chunks are
+    dropped.
+    """
+    system = compile_system(system)
+
+    # Look far enough to see the longest phrase across the boundary
+    longest_phrase = max((len(phrase.split()) for phrase in system['phrases']), default=0)
+    context_words = max(context_words, longest_phrase)
+
+    pending = None
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+        if pending is None:
+            pending = chunk
+        elif separable(pending, chunk, system, active_rules, context_words):
+            yield pending
+            pending = chunk
+        else:
+            pending = pending + ' ' + chunk
+
+    if pending is not None:
+        yield pending
+
+
+def process_text_stream(chunks, system: dict | CompiledSystem,
+                        active_rules: list[str] | None = None,
+                        context_words: int = STREAM_CONTEXT_WORDS):
+    """
+    Process a stream of raw text chunks, yielding (processed_text, multi_word_matches).
+
+    Chunks are joined with `join_chunks` wherever a phrase or rule spans their
+    boundary, and each joined text is processed with `process_text` on its
+    own, so the phrase placeholders of a yielded text index its own match
+    list. The result is identical to processing the whole text at once.
+    """
+    system = compile_system(system)
+    for text in join_chunks(chunks, system, active_rules, context_words):
+        yield process_text(text, system, active_rules)
 
 
 def compare_tokenizations(a: dict, b: dict) -> bool:
@@ -141,96 +910,83 @@ def compare_tokenizations(a: dict, b: dict) -> bool:
     return False
 
 
-def tokenize_string(word: str, system: dict, active_modes: list[str] | None = None) -> list:
+def tokenize_string(word: str, system: dict | CompiledSystem,
+                    active_modes: list[str] | None = None) -> list:
     """
-    Tokenize a word into glyph splines using a memoized greedy algorithm.
+    Tokenize a word into glyph splines using dynamic programming.
 
     Priority:
     1. Highest mode count (prefer mode matches)
     2. Lowest token count (prefer longer matches)
     3. Longest single token (tiebreaker)
+
+    The best tokenization of each suffix is computed right to left, storing only
+    its score and a back-pointer to the token chosen there; the token list is
+    rebuilt once at the end. Zero-length matches are ignored.
+
+    Pass a `CompiledSystem` to reuse its precompiled matchers across words.
     """
     if not word:
         return []
 
-    glyphs = system['glyphs']
-    modes = system['modes']
-
-    if active_modes is None:
-        active_modes = list(modes.keys())
+    system = compile_system(system)
+    mode_lattice = build_mode_lattice(system.active_mode_matchers(active_modes), word)
+    glyph_trie = system.glyph_trie
 
-    # Build regex list: modes first (higher priority), then glyphs
-    regex_list = []
+    n = len(word)
 
-    # Add modes with their patterns
-    for mode_name, mode_data in modes.items():
-        if mode_name not in active_modes:
-            continue
-        try:
-            pattern = re.compile(mode_data['pattern'])
-            regex_list.append({
-                'pattern': pattern,
-                'value': mode_data['points'],
-                'is_mode': True
-            })
-        except re.error:
-            continue
-
-    # Add glyphs (escape special regex characters in glyph names)
-    for glyph_name, glyph_points in glyphs.items():
-        escaped_pattern = re.escape(glyph_name)
-        pattern = re.compile(escaped_pattern)
-        regex_list.append({
-            'pattern': pattern,
-            'value': glyph_points,
-            'is_mode': False
-        })
-
-    memo = {}
-
-    def find_best_tokenization(start: int) -> dict | None:
-        if start == len(word):
-            return {'tokens': [], 'count': 0, 'longest_token': 0, 'mode_count': 0}
+    # scores[i] is (mode_count, -count, longest_token) of the best tokenization
+    # of word[i:], so a higher tuple is a better tokenization exactly as in
+    # compare_tokenizations; None marks a suffix that cannot be tokenized.
+    scores = [None] * (n + 1)
+    scores[n] = (0, 0, 0)
+    back = [None] * (n + 1)
 
-        if start in memo:
-            return memo[start]
+    for start in range(n - 1, -1, -1):
+        best_score = None
+        best_back = None
 
-        best_tokenization = None
+        # Candidates at the current position: modes first (higher priority), then glyphs
+        candidates = [(match_length, value, 1) for match_length, value in mode_lattice[start]]
+        candidates.extend((match_length, value, 0)
+                          for match_length, value in match_glyphs(glyph_trie, word, start))
 
-        for item in regex_list:
-            pattern = item['pattern']
-            value = item['value']
-            is_mode = item['is_mode']
+        for match_length, value, is_mode in candidates:
+            if match_length == 0:
+                continue
 
-            # Try to match at the current position
-            match = pattern.match(word, start)
-            if match and match.start() == start:
-                match_length = len(match.group(0))
-                remaining = find_best_tokenization(start + match_length)
+            remaining = scores[start + match_length]
+            if remaining is None:
+                continue
 
-                if remaining is None:
-                    continue
+            current = (remaining[0] + is_mode,
+                       remaining[1] - 1,
+                       max(match_length, remaining[2]))
 
-                current = {
-                    'tokens': [value] + remaining['tokens'],
-                    'count': 1 + remaining['count'],
-                    'longest_token': max(match_length, remaining['longest_token']),
-                    'mode_count': (1 if is_mode else 0) + remaining['mode_count']
-                }
+            # Ties keep the earlier candidate
+            if best_score is None or current > best_score:
+                best_score = current
+                best_back = (match_length, value)
 
-                if best_tokenization is None or compare_tokenizations(current, best_tokenization):
-                    best_tokenization = current
+        scores[start] = best_score
+        back[start] = best_back
 
-        memo[start] = best_tokenization
-        return best_tokenization
+    if scores[0] is None:
+        return []
 
-    result = find_best_tokenization(0)
-    return result['tokens'] if result else []
+    tokens = []
+    start = 0
+    while start < n:
+        match_length, value = back[start]
+        tokens.append(value)
+        start += match_length
+    return tokens
 
 
-def tokenize_with_phrases(text: str, system: dict, active_modes: list[str] | None,
+def tokenize_with_phrases(text: str, system: dict | CompiledSystem, active_modes: list[str] | None,
                           multi_word_matches: list) -> tuple[list, list]:
     """Tokenize text, handling phrase placeholders. Returns (tokens, original_words)."""
+    system = compile_system(system)
     words = text.split()
     all_tokens = []
     original_words = []
@@ -249,61 +1005,327 @@ def tokenize_with_phrases(text: str, system: dict, active_modes: list[str] | Non
                 all_tokens.append([])
                 original_words.append('')
         else:
-            tokens = tokenize_string(word, system, active_modes)
+            tokens = system.tokenize(word, active_modes)
             all_tokens.append(tokens)
             original_words.append(word)
 
+    if profiler.enabled:
+        profiler.count('words', len(all_tokens))
+        profiler.count('failed tokenizations', sum(1 for tokens in all_tokens if not tokens))
+
     return all_tokens, original_words
 
 
+def stream_words(chunks, system: dict | CompiledSystem, active_rules: list[str] | None,
+                 active_modes: list[str] | None):
+    """Yield the words of a raw text stream as PackedWords, one chunk at a time."""
+    system = compile_system(system)
+    for processed_text, multi_word_matches in process_text_stream(chunks, system, active_rules):
+        with profiler.stage('tokenize'):
+            tokens, original_words = tokenize_with_phrases(
+                processed_text, system, active_modes, multi_word_matches
+            )
+        with profiler.stage('merge'):
+            yield merge_words(tokens, original_words)
+
+
+class PackedWords:
+    """
+    Merged words of a text as ragged arrays, in the layout of `pack_shapes`.
+
+    All points are one (N, 2) float64 array; stroke i spans
+    points[stroke_offsets[i]:stroke_offsets[i + 1]] and word j spans strokes
+    word_offsets[j] to word_offsets[j + 1]. A word without strokes is empty and
+    only takes up space. `labels` holds the original word of each word (None
+    for no label).
+    """
+
+    def __init__(self, points: np.ndarray, stroke_offsets: np.ndarray, word_offsets: np.ndarray,
+                 labels: list | None = None):
+        self.points = points
+        self.stroke_offsets = stroke_offsets
+        self.word_offsets = word_offsets
+        self.labels = list(labels) if labels is not None else [None] * (len(word_offsets) - 1)
+        # Unscaled (x_min, x_max, y_min, y_max) of each word, from `word_bounds`
+        self.bounds = None
+
+    @classmethod
+    def from_lists(cls, word_splines: list, labels: list | None = None) -> 'PackedWords':
+        """Pack words given as nested point lists."""
+        return cls(*pack_shapes(word_splines), labels)
+
+    @classmethod
+    def concatenate(cls, parts: list) -> 'PackedWords':
+        """Join several PackedWords into one."""
+        if len(parts) == 1:
+            return parts[0]
+        point_bases = np.cumsum([0] + [len(part.points) for part in parts[:-1]])
+        stroke_bases = np.cumsum([0] + [len(part.stroke_offsets) - 1 for part in parts[:-1]])
+        words = cls(
+            np.concatenate([part.points for part in parts]).reshape(-1, 2),
+            np.concatenate([[0]] + [part.stroke_offsets[1:] + base
+                                    for part, base in zip(parts, point_bases)]),
+            np.concatenate([[0]] + [part.word_offsets[1:] + base
+                                    for part, base in zip(parts, stroke_bases)]),
+            [label for part in parts for label in part.labels],
+        )
+        if all(part.bounds is not None for part in parts):
+            words.bounds = np.concatenate([part.bounds for part in parts])
+        return words
+
+    def __len__(self):
+        return len(self.word_offsets) - 1
+
+    def __getitem__(self, index: slice) -> 'PackedWords':
+        """Return words `index` (a slice with step 1) as PackedWords sharing these arrays."""
+        start, stop, _ = index.indices(len(self))
+        stop = max(start, stop)
+        word_offsets = self.word_offsets[start:stop + 1]
+        stroke_offsets = self.stroke_offsets[word_offsets[0]:word_offsets[-1] + 1]
+        words = PackedWords(
+            self.points[stroke_offsets[0]:stroke_offsets[-1]],
+            stroke_offsets - stroke_offsets[0],
+            word_offsets - word_offsets[0],
+            self.labels[start:stop],
+        )
+        if self.bounds is not None:
+            words.bounds = self.bounds[start:stop]
+        return words
+
+    def stroke_counts(self) -> np.ndarray:
+        """Return the number of strokes of each word."""
+        return np.diff(self.word_offsets)
+
+    def point_counts(self) -> np.ndarray:
+        """Return the number of points of each word."""
+        return np.diff(self.stroke_offsets[self.word_offsets])
+
+    def word_bounds(self) -> np.ndarray:
+        """Return the unscaled (x_min, x_max, y_min, y_max) of each word, or zeros if it is empty."""
+        if self.bounds is None:
+            bounds = np.zeros((len(self), 4))
+            point_starts = self.stroke_offsets[self.word_offsets[:-1]]
+            drawn = np.flatnonzero(self.point_counts())
+            if len(drawn):
+                starts = point_starts[drawn]
+                bounds[drawn, 0] = np.minimum.reduceat(self.points[:, 0], starts)
+                bounds[drawn, 1] = np.maximum.reduceat(self.points[:, 0], starts)
+                bounds[drawn, 2] = np.minimum.reduceat(self.points[:, 1], starts)
+                bounds[drawn, 3] = np.maximum.reduceat(self.points[:, 1], starts)
+            self.bounds = bounds
+        return self.bounds
+
+    def word(self, index: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the points of word `index` and its stroke offsets into them."""
+        stroke_offsets = self.stroke_offsets[self.word_offsets[index]:self.word_offsets[index + 1] + 1]
+        return self.points[stroke_offsets[0]:stroke_offsets[-1]], stroke_offsets - stroke_offsets[0]
+
+    def tolist(self) -> list:
+        """Return the words as nested point lists, like `merge_word_splines`."""
+        return unpack_shapes(self.points, self.stroke_offsets, self.word_offsets)
+
+
+def glyph_summary(glyph_splines: list) -> tuple | None:
+    """
+    Return (first_x, first_y, exit_x, exit_y) of a glyph for merging: the point
+    it is normalized by and its last point, which the next glyph is attached
+    to. Returns None if the glyph has no points, in which case merging skips it.
+    """
+    points = [point for spline_points in glyph_splines if spline_points for point in spline_points]
+    if not points:
+        return None
+    first_point = glyph_splines[0][0] if glyph_splines[0] else [0, 0]
+    return (first_point[0], first_point[1], points[-1][0], points[-1][1])
+
+
+def merge_words(text_splines: list, labels: list | None = None) -> PackedWords:
+    """
+    Merge the glyphs of each word into one shape, as PackedWords.
+
+    Each glyph is shifted so its first point connects to the last point of the
+    previous glyph. The first glyph of a word keeps its own coordinates.
+
+    Repeated words share their token lists through the token cache, so each
+    distinct token list is merged once and copied to all of its occurrences.
+    The glyphs of all distinct words are shifted together: each glyph's shift
+    is the end of the previous glyph, which is propagated through the words
+    one glyph position at a time. All of the points are then moved in one
+    array operation. The arithmetic is the same per point as shifting them
+    one by one, so the results are identical.
+    """
+    # Distinct token lists, in order of first appearance
+    word_index = {}
+    word_ids = np.array([word_index.setdefault(id(tokens), len(word_index))
+                         for tokens in text_splines], dtype=np.int64)
+    distinct = list({id(tokens): tokens for tokens in text_splines}.values())
+
+    # Glyphs of the distinct words, each shape packed once
+    shape_index = {}
+    shapes = []
+    glyph_words = []
+    glyph_shapes = []
+    glyph_moved = []
+    for u, tokens in enumerate(distinct):
+        for gi, glyph_splines in enumerate(tokens):
+            shape = shape_index.get(id(glyph_splines))
+            if shape is None:
+                shape = shape_index[id(glyph_splines)] = len(shapes)
+                shapes.append(glyph_splines)
+            glyph_words.append(u)
+            glyph_shapes.append(shape)
+            # Glyphs after the first are normalized to their first point
+            glyph_moved.append(gi != 0)
+
+    # Glyphs without points are left out, without moving the next glyph
+    summaries = [glyph_summary(glyph_splines) for glyph_splines in shapes]
+    shape_points, shape_stroke_offsets, shape_offsets = pack_shapes(
+        [[points for points in glyph_splines if points] for glyph_splines in shapes]
+    )
+    summary_array = np.array([summary or (0.0,) * 4 for summary in summaries], dtype=float).reshape(-1, 4)
+    has_points = np.array([summary is not None for summary in summaries], dtype=bool)
+
+    glyph_words = np.array(glyph_words, dtype=np.int64)
+    glyph_shapes = np.array(glyph_shapes, dtype=np.int64)
+    glyph_moved = np.array(glyph_moved, dtype=bool)
+    kept = has_points[glyph_shapes] if len(glyph_shapes) else np.zeros(0, dtype=bool)
+    glyph_words, glyph_shapes, glyph_moved = glyph_words[kept], glyph_shapes[kept], glyph_moved[kept]
+
+    first = np.where(glyph_moved[:, None], summary_array[glyph_shapes, 0:2], 0.0)
+    exit_point = summary_array[glyph_shapes, 2:4]
+
+    # Each glyph continues from the end of the previous glyph of its word
+    shift = np.zeros((len(glyph_shapes), 2))
+    if len(glyph_shapes):
+        word_starts = np.flatnonzero(np.concatenate(([True], glyph_words[1:] != glyph_words[:-1])))
+        position = np.arange(len(glyph_shapes)) - np.repeat(word_starts, np.diff(
+            np.concatenate((word_starts, [len(glyph_shapes)]))))
+        for rank in range(1, int(position.max()) + 1):
+            glyphs = np.flatnonzero(position == rank)
+            shift[glyphs] = (exit_point[glyphs - 1] - first[glyphs - 1]) + shift[glyphs - 1]
+
+    # Gather and move the points of every glyph
+    glyph_stroke_starts = shape_offsets[glyph_shapes]
+    glyph_stroke_counts = shape_offsets[glyph_shapes + 1] - glyph_stroke_starts
+    strokes = ragged_indices(glyph_stroke_starts, glyph_stroke_counts)
+    stroke_lengths = np.diff(shape_stroke_offsets)[strokes]
+    glyph_point_starts = shape_stroke_offsets[glyph_stroke_starts]
+    glyph_point_counts = shape_stroke_offsets[glyph_stroke_starts + glyph_stroke_counts] - glyph_point_starts
+    points = ((shape_points[ragged_indices(glyph_point_starts, glyph_point_counts)]
+               - np.repeat(first, glyph_point_counts, axis=0))
+              + np.repeat(shift, glyph_point_counts, axis=0))
+    stroke_offsets = np.concatenate(([0], np.cumsum(stroke_lengths)))
+    word_stroke_counts = np.bincount(glyph_words, weights=glyph_stroke_counts,
+                                     minlength=len(distinct)).astype(np.int64)
+    word_offsets = np.concatenate(([0], np.cumsum(word_stroke_counts)))
+    merged = PackedWords(points.reshape(-1, 2), stroke_offsets, word_offsets)
+
+    # Copy the distinct words to every occurrence
+    if len(distinct) < len(text_splines):
+        word_strokes = ragged_indices(word_offsets[word_ids], word_stroke_counts[word_ids])
+        point_starts = stroke_offsets[word_strokes]
+        point_counts = stroke_offsets[word_strokes + 1] - point_starts
+        merged = PackedWords(points[ragged_indices(point_starts, point_counts)].reshape(-1, 2),
+                             np.concatenate(([0], np.cumsum(point_counts))),
+                             np.concatenate(([0], np.cumsum(word_stroke_counts[word_ids]))))
+
+    merged.labels = list(labels) if labels is not None else [None] * len(merged)
+    return merged
+
+
 def merge_word_splines(text_splines: list) -> list:
     """
     Merge word splines by concatenating points for each word and adjusting shifts.
 
     Each glyph is shifted so its first point connects to the last point of the
-    previous glyph.
+    previous glyph. Returns nested point lists; see `merge_words` for the
+    packed form the pipeline uses.
     """
-    words = []
+    return merge_words(text_splines).tolist()
 
-    for word_splines in text_splines:
-        current_word = []
-        current_shift = [0.0, 0.0]
 
-        for gi, glyph_splines in enumerate(word_splines):
-            if not glyph_splines:
-                continue
+# Compiled system of a tokenizing worker process
+_worker_system = None
 
-            # Get the first point of the first spline of this glyph for normalization
-            first_point = glyph_splines[0][0] if glyph_splines[0] else [0, 0]
 
-            for points in glyph_splines:
-                if not points:
-                    continue
+def init_tokenize_worker(system: CompiledSystem) -> None:
+    """Worker initializer: keep the compiled system sent from the parent process."""
+    global _worker_system
+    _worker_system = system
 
-                # Clone points
-                shifted_points = [[p[0], p[1]] for p in points]
 
-                # Normalize: shift so glyph's origin is at (0,0) relative to its first point
-                # Only for glyphs after the first one
-                if gi != 0:
-                    for i in range(len(shifted_points)):
-                        shifted_points[i][0] -= first_point[0]
-                        shifted_points[i][1] -= first_point[1]
+def tokenize_slice(text: str, active_modes: list[str] | None,
+                   multi_word_matches: list) -> PackedWords:
+    """Tokenize and merge a slice of processed text with the worker's system."""
+    tokens, original_words = tokenize_with_phrases(text, _worker_system, active_modes,
+                                                   multi_word_matches)
+    return merge_words(tokens, original_words)
 
-                # Apply accumulated shift (position at end of previous glyph)
-                for point in shifted_points:
-                    point[0] += current_shift[0]
-                    point[1] += current_shift[1]
 
-                current_word.append(shifted_points)
+def tokenize_parallel(text: str, system: dict | CompiledSystem, active_modes: list[str] | None,
+                      multi_word_matches: list, jobs: int,
+                      slice_chars: int = TOKENIZE_SLICE_CHARS) -> list[PackedWords]:
+    """
+    Tokenize and merge processed text in a pool of `jobs` worker processes.
+
+    The text is cut at whitespace into contiguous slices of about
+    `slice_chars` characters, and each slice is tokenized with
+    `tokenize_with_phrases` and merged with `merge_words` in a worker,
+    together with the phrase matches of its own § placeholders, so that they
+    line up as in one pass. The compiled system is sent to each worker once,
+    when it starts. Workers merge their own slices because packed arrays are
+    far cheaper to send back than nested token lists.
+
+    Returns the merged slices in order, as chunks for `layout_pages` or
+    `write_tokens`; joined, they are the words `merge_words` gives over
+    `tokenize_with_phrases`. Text of a single slice is done in this process.
+    """
+    system = compile_system(system)
+
+    cuts = [0]
+    while cuts[-1] < len(text):
+        match = WHITESPACE.search(text, cuts[-1] + slice_chars)
+        cuts.append(match.start() if match else len(text))
+
+    if jobs <= 1 or len(cuts) <= 2:
+        tokens, original_words = tokenize_with_phrases(text, system, active_modes,
+                                                       multi_word_matches)
+        return [merge_words(tokens, original_words)]
+
+    # Each slice takes the phrase matches of its own placeholders; counting
+    # § characters is exact unless some are inside longer words
+    texts = [text[start:end] for start, end in zip(cuts, cuts[1:])]
+    if EMBEDDED_PLACEHOLDER.search(text):
+        placeholders = [part.split().count('§') for part in texts]
+    else:
+        placeholders = [part.count('§') for part in texts]
+    match_ends = np.concatenate(([0], np.cumsum(placeholders, dtype=np.int64))).tolist()
+    matches = [multi_word_matches[first:last] for first, last in zip(match_ends, match_ends[1:])]
+    profiler.count('tokenized slices', len(texts))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_tokenize_worker,
+                             initargs=(system,)) as executor:
+        parts = list(executor.map(tokenize_slice, texts, [active_modes] * len(texts), matches))
+    profiler.count('words', sum(len(part) for part in parts))
+    return parts
+
+
+@lru_cache(maxsize=None)
+def spline_basis(num_control: int, num_points: int = 100) -> np.ndarray:
+    """
+    Return the (num_points, num_control) matrix sampling a natural cubic spline.
 
-            # Update shift to last point of last spline of this glyph
-            if current_word and current_word[-1]:
-                current_shift = list(current_word[-1][-1])
+    A natural cubic spline through points at evenly spaced parameters is linear
+    in those points, so sampling it is a matrix product with this basis. The
+    basis only depends on the number of control points, which means every
+    stroke shape (and any translated or scaled copy of it) shares one of a few
+    cached matrices instead of building its own spline.
+    """
+    from scipy.interpolate import CubicSpline
 
-        words.append(current_word)
+    t = np.linspace(0, 1, num_control)
+    t_new = np.linspace(0, 1, num_points)
 
-    return words
+    # Natural cubic spline (bc_type='natural' sets second derivative to 0 at endpoints)
+    return CubicSpline(t, np.eye(num_control), bc_type='natural')(t_new)
 
 
 def interpolate_spline(points: list, num_points: int = 100) -> tuple[np.ndarray, np.ndarray]:
@@ -317,260 +1339,1417 @@ def interpolate_spline(points: list, num_points: int = 100) -> tuple[np.ndarray,
     Returns:
         Tuple of (x_coords, y_coords) arrays
     """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
     if len(points) < 2:
-        x = np.array([p[0] for p in points])
-        y = np.array([p[1] for p in points])
-        return x, y
+        return points[:, 0], points[:, 1]
 
-    x = np.array([p[0] for p in points])
-    y = np.array([p[1] for p in points])
-    t = np.linspace(0, 1, len(points))
-    t_new = np.linspace(0, 1, num_points)
+    curve = spline_basis(len(points), num_points) @ points
+    return curve[:, 0], curve[:, 1]
 
-    # Natural cubic spline (bc_type='natural' sets second derivative to 0 at endpoints)
-    cs_x = CubicSpline(t, x, bc_type='natural')
-    cs_y = CubicSpline(t, y, bc_type='natural')
 
-    return cs_x(t_new), cs_y(t_new)
+def interpolate_splines(strokes: list, num_points: int = 100) -> list:
+    """
+    Interpolate many strokes at once.
 
+    Strokes (arrays of shape (n, 2), n >= 2) are grouped by control point count
+    and each group is sampled with one batched product against its
+    `spline_basis`. Returns one (num_points, 2) array per stroke, in order.
+    """
+    curves = [None] * len(strokes)
+    groups = {}
+    for i, stroke in enumerate(strokes):
+        groups.setdefault(len(stroke), []).append(i)
 
-def calculate_word_dimensions(word_splines: list, scaling_factor: float, glyph_scale: float) -> dict:
-    """Calculate the dimensions of a word's splines."""
-    if not word_splines:
-        return {'width': 0, 'ascent': 0, 'descent': 0, 'x_min': 0}
+    for num_control, indices in groups.items():
+        batch = spline_basis(num_control, num_points) @ np.stack([strokes[i] for i in indices])
+        for i, curve in zip(indices, batch):
+            curves[i] = curve
 
-    all_x = []
-    all_y = []
+    return curves
 
-    for spline_points in word_splines:
-        if not spline_points:
-            continue
-        for p in spline_points:
-            all_x.append(p[0] * scaling_factor * glyph_scale)
-            all_y.append(p[1] * scaling_factor * glyph_scale)
 
-    if not all_x:
-        return {'width': 0, 'ascent': 0, 'descent': 0, 'x_min': 0}
+class LabelMetrics:
+    """
+    Beginner-mode label widths from the label font's per-glyph advances.
+
+    Each character's advance width is loaded once from the font matplotlib
+    draws labels with, and the width of every distinct label is memoized, so
+    no Text artists have to be created and rendered to measure them. Widths are
+    in layout data units, matching what measuring a drawn label on a default
+    figure gives (up to kerning, which is below a pixel).
+    """
+
+    def __init__(self, fontsize: float = 8):
+        import matplotlib.pyplot as plt
+        from matplotlib import font_manager
+        from matplotlib.backends.backend_agg import get_hinting_flag
+
+        self.fontsize = fontsize
+        self.dpi = plt.rcParams['figure.dpi']
+        self._font = font_manager.get_font(
+            font_manager.findfont(font_manager.FontProperties(size=fontsize)))
+        self._flags = get_hinting_flag()
+
+        # Advances are in 1/64 pixel; the default axes span (right - left) of
+        # the figure width, which maps to the page width in data units
+        axes_span = plt.rcParams['figure.subplot.right'] - plt.rcParams['figure.subplot.left']
+        self._units = 1 / (64 * self.dpi * axes_span)
+
+        self._advances = {}
+        self._widths = {}
+
+    def advance(self, char: str) -> int:
+        """Return the advance width of a character in 1/64 pixel."""
+        advance = self._advances.get(char)
+        if advance is None:
+            # The font object is shared with matplotlib, so always set its size
+            self._font.set_size(self.fontsize, self.dpi)
+            advance = self._font.load_char(ord(char), flags=self._flags).horiAdvance
+            self._advances[char] = advance
+        return advance
+
+    def width(self, text: str) -> float:
+        """Return the width of a label in layout data units."""
+        width = self._widths.get(text)
+        if width is None:
+            width = sum(self.advance(char) for char in text) * self._units
+            self._widths[text] = width
+        return width
+
+
+@lru_cache(maxsize=None)
+def label_metrics(fontsize: float = 8) -> LabelMetrics:
+    """Return the shared `LabelMetrics` for a font size."""
+    return LabelMetrics(fontsize)
+
+
+def page_settings(page_size: str = 'letter', show_baselines: bool = False,
+                  beginner_mode: bool = False, scale: float = 0.33,
+                  collect_strokes: bool = False) -> dict:
+    """Return the page geometry and drawing options shared by layout and rendering."""
+    # Page dimensions in inches
+    page_sizes = {
+        'letter': (8.5, 11),
+        'a4': (8.27, 11.69)
+    }
+    page_width, page_height = page_sizes.get(page_size, page_sizes['letter'])
 
-    x_min = min(all_x)
-    x_max = max(all_x)
-    y_max = max(all_y)
-    y_min = min(all_y)
+    # Scaling factors
+    scaling_factor = 6.0
+    glyph_scale = 0.5 * scale  # Scale glyphs to reasonable size in inches
+    line_spacing = 0.4 * scaling_factor * glyph_scale
+    if beginner_mode:
+        line_spacing = 0.7 * scaling_factor * glyph_scale  # Extra space for text labels
 
     return {
-        'width': x_max - x_min,
-        'ascent': y_max,
-        'descent': y_min,
-        'x_min': x_min
+        'page_width': page_width,
+        'page_height': page_height,
+        'margin': 0.75,  # Margins in inches
+        'scaling_factor': scaling_factor,
+        'glyph_scale': glyph_scale,
+        'space_between_words': 0.2 * scaling_factor * glyph_scale,
+        'line_spacing': line_spacing,
+        'show_baselines': show_baselines,
+        'beginner_mode': beginner_mode,
+        'scale': scale,
+        'collect_strokes': collect_strokes,
     }
 
 
-def render_to_pdf(word_splines: list, original_words: list,
+def break_lines(effective_widths: np.ndarray, space: float, line_width: float) -> list[int]:
+    """
+    Return the index of the first word of each line.
+
+    A word starts a new line if the line so far is not empty and the word
+    would end past `line_width`. The end of word k relative to the start of
+    word s is e[k] - c[s] for cumulative widths c and ends e, which increase
+    with k, so each line's end is found by binary search.
+    """
+    starts = np.concatenate(([0.0], np.cumsum(effective_widths + space)))
+    ends = starts[:-1] + effective_widths
+    next_starts = np.searchsorted(ends, starts[:-1] + line_width, side='right')
+    # A word wider than the line still gets a line of its own
+    next_starts = np.maximum(next_starts, np.arange(1, len(effective_widths) + 1)).tolist()
+    line_starts = []
+    start = 0
+    while start < len(next_starts):
+        line_starts.append(start)
+        start = next_starts[start]
+    return line_starts
+
+
+def layout_pages(words, settings: dict, measure_text=None):
+    """
+    Lay out a stream of words into pages with automatic line wrapping.
+
+    Yields one page at a time as soon as it is full. A page is a plain,
+    picklable layout plan::
+
+        {'words': PackedWords, 'x': ndarray, 'x_min': ndarray,
+         'label_x': ndarray, 'label_width': ndarray,
+         'lines': [{'baseline_y': float, 'descent': float,
+                    'start': int, 'end': int}]}
+
+    where `words` holds the words on the page with their labels, and the
+    arrays have one entry per word. Line i has words start to end; empty words
+    among them are not drawn. `x` is the left edge of a word on the page and
+    `x_min` the word's own left extent, so a scaled point p is drawn at
+    p - x_min + x. Labels are centered on `label_x`; `label_width` is their
+    measured width (0 outside beginner mode).
+
+    Line breaks, line heights and positions are computed with NumPy over each
+    chunk of words at once; only placing lines on pages runs per line.
+
+    Args:
+        words: Iterable of PackedWords chunks, as from `merge_words`; the
+            last line of a chunk is continued by the next one
+        settings: Page settings from `page_settings`
+        measure_text: Callable returning the width of a label, required in
+            beginner mode
+    """
+    page_width = settings['page_width']
+    page_height = settings['page_height']
+    margin = settings['margin']
+    scaling_factor = settings['scaling_factor']
+    glyph_scale = settings['glyph_scale']
+    space_between_words = settings['space_between_words']
+    line_spacing = settings['line_spacing']
+    beginner_mode = settings['beginner_mode']
+
+    def make_page(lines, parts):
+        """Build a page from its lines and the (chunk, arrays, start, end) word ranges they span."""
+        if not parts:
+            return {'words': PackedWords.from_lists([]), 'x': np.zeros(0), 'x_min': np.zeros(0),
+                    'label_x': np.zeros(0), 'label_width': np.zeros(0), 'lines': lines}
+        page = {'words': PackedWords.concatenate([chunk[start:end] for chunk, _, start, end in parts])}
+        for i, key in enumerate(['x', 'x_min', 'label_x', 'label_width']):
+            page[key] = np.concatenate([arrays[i][start:end] for _, arrays, start, end in parts])
+        page['lines'] = lines
+        return page
+
+    lines = []
+    parts = []
+    page_words = 0
+    current_y = page_height - margin
+    pending = None  # Words of the last line, which the next chunk may continue
+
+    words = iter(words)
+    chunk = next(words, None)
+    while chunk is not None:
+        following = next(words, None)
+        exhausted = following is None
+        if pending is not None:
+            chunk = PackedWords.concatenate([pending, chunk])
+        count = len(chunk)
+
+        if count:
+            bounds = chunk.word_bounds() * scaling_factor * glyph_scale
+            x_min = bounds[:, 0]
+            width = bounds[:, 1] - bounds[:, 0]
+            ascent = bounds[:, 3]
+            descent = bounds[:, 2]
+            empty = chunk.stroke_counts() == 0
+
+            # In beginner mode, account for text label width
+            if beginner_mode:
+                labelled = np.array([label is not None for label in chunk.labels], dtype=bool)
+                text_width = np.array([measure_text(label) if label is not None else 0.0
+                                       for label in chunk.labels], dtype=float)
+                effective_width = np.where(labelled, np.maximum(width, text_width), width)
+                # Center the text under the shorthand, so account for text extending beyond
+                extra_text_space = np.where(labelled, np.maximum(0, text_width / 2 - width / 2), 0.0)
+            else:
+                text_width = np.zeros(count)
+                effective_width = width
+                extra_text_space = 0.0
+
+            line_starts = break_lines(effective_width, space_between_words, page_width - 2 * margin)
+            line_ascent = np.maximum.reduceat(ascent, line_starts).tolist()
+            line_descent = np.minimum.reduceat(descent, line_starts).tolist()
+
+            # Word positions: advances summed from the margin along each line,
+            # one word column at a time, so that a position does not depend on
+            # where its chunk started
+            advance = np.where(empty, space_between_words,
+                               width + extra_text_space + space_between_words)
+            first_words = np.array(line_starts)
+            line_lengths = np.diff(np.append(first_words, count))
+            render_x = np.empty(count)
+            line_x = np.full(len(first_words), margin)
+            for column in range(int(line_lengths.max())):
+                open_lines = line_lengths > column
+                index = first_words[open_lines] + column
+                render_x[index] = line_x[open_lines]
+                line_x[open_lines] += advance[index]
+            label_x = (render_x + (render_x + width)) / 2
+            arrays = (render_x, x_min, label_x, text_width)
+
+            # The last line stays open until the next chunk or the end of the input
+            line_ends = line_starts[1:] + [count]
+            if not exhausted:
+                pending = chunk[line_starts[-1]:]
+                line_starts.pop()
+                line_ends.pop()
+
+            for line, (start, end) in enumerate(zip(line_starts, line_ends)):
+                ascent_ = line_ascent[line]
+                descent_ = line_descent[line]
+
+                # Position baseline
+                current_y -= ascent_
+                baseline_y = current_y
+
+                # Check if we need a new page
+                needed_height = abs(descent_) + line_spacing
+                if beginner_mode:
+                    needed_height += 0.2
+
+                if current_y - needed_height < margin:
+                    yield make_page(lines, parts)
+                    lines = []
+                    parts = []
+                    page_words = 0
+                    current_y = page_height - margin - ascent_
+                    baseline_y = current_y
+
+                lines.append({'baseline_y': baseline_y, 'descent': descent_,
+                              'start': page_words, 'end': page_words + end - start})
+                page_words += end - start
+                if parts and parts[-1][0] is chunk and parts[-1][3] == start:
+                    parts[-1] = (chunk, arrays, parts[-1][2], end)
+                else:
+                    parts.append((chunk, arrays, start, end))
+
+                # Move to next line
+                current_y -= abs(descent_) + line_spacing
+
+        chunk = following
+
+    yield make_page(lines, parts)
+
+
+def place_points(points: np.ndarray, x_min, render_x, settings: dict) -> np.ndarray:
+    """
+    Scale raw word points to page units, with each word's left edge moved to
+    `render_x` and y relative to the baseline. `x_min` and `render_x` are
+    numbers, or arrays with one value per point.
+    """
+    placed = points * settings['scaling_factor'] * settings['glyph_scale']
+    placed[:, 0] = placed[:, 0] - x_min + render_x
+    return placed
+
+
+def word_marks(points: np.ndarray, stroke_offsets) -> list:
+    """
+    Resolve a placed word's strokes into the strokes and dots to draw.
+
+    `points` are placed with `place_points` and stroke i of the word spans
+    points[stroke_offsets[i]:stroke_offsets[i + 1]]. Returns ('stroke', points)
+    and ('dot', x, y) marks in stroke order, where stroke points are (n, 2)
+    views of `points`.
+    """
+    marks = []
+    stroke_endpoints = set()  # Track endpoints of multi-point strokes
+
+    bounds = list(stroke_offsets)
+    for stroke_idx, (start, end) in enumerate(zip(bounds, bounds[1:])):
+        if start == end:
+            continue
+
+        if end - start == 1:
+            # Skip single-point strokes at the start of a word (elevation markers)
+            if stroke_idx == 0:
+                continue
+            # Skip single-point strokes that duplicate a stroke endpoint
+            # (these are connection markers, not real dots)
+            x, y = float(points[start, 0]), float(points[start, 1])
+            if (round(x, 4), round(y, 4)) in stroke_endpoints:
+                continue
+            marks.append(('dot', x, y))
+        else:
+            marks.append(('stroke', points[start:end]))
+            # Track the endpoint of this stroke
+            x, y = float(points[end - 1, 0]), float(points[end - 1, 1])
+            stroke_endpoints.add((round(x, 4), round(y, 4)))
+
+    return marks
+
+
+def page_marks(page: dict, settings: dict) -> tuple[list, list]:
+    """
+    Resolve a page from `layout_pages` into the marks a backend has to draw.
+
+    Returns (operations, strokes). Operations are in page order and are one of
+    ('stroke', index into strokes, baseline_y), ('dot', x, y),
+    ('baseline', y) or ('label', x, y, text). Strokes are the scaled control
+    points of each stroke as (n, 2) arrays, relative to their baseline.
+    """
+    operations = []
+    strokes = []
+
+    # Place all of the page's points at once
+    words = page['words']
+    point_counts = words.point_counts()
+    points = place_points(words.points, np.repeat(page['x_min'], point_counts),
+                          np.repeat(page['x'], point_counts), settings)
+    stroke_offsets = words.stroke_offsets.tolist()
+    word_offsets = words.word_offsets.tolist()
+    label_x = page['label_x'].tolist()
+
+    for line in page['lines']:
+        baseline_y = line['baseline_y']
+
+        # Draw baseline if requested
+        if settings['show_baselines']:
+            operations.append(('baseline', baseline_y))
+
+        for i in range(line['start'], line['end']):
+            if word_offsets[i] == word_offsets[i + 1]:
+                continue
+            word_strokes = stroke_offsets[word_offsets[i]:word_offsets[i + 1] + 1]
+            for mark in word_marks(points, word_strokes):
+                if mark[0] == 'dot':
+                    operations.append(('dot', mark[1], baseline_y + mark[2]))
+                else:
+                    operations.append(('stroke', len(strokes), baseline_y))
+                    strokes.append(mark[1])
+
+            # Draw original word below shorthand in beginner mode
+            label = words.labels[i]
+            if settings['beginner_mode'] and label is not None:
+                label_y = baseline_y + line['descent'] - 0.1
+                operations.append(('label', label_x[i], label_y, label))
+
+    return operations, strokes
+
+
+def draw_page(page: dict, settings: dict):
+    """Draw a page from `layout_pages` onto a new matplotlib figure and return it."""
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    page_width = settings['page_width']
+    margin = settings['margin']
+    scale = settings['scale']
+
+    fig, ax = plt.subplots(figsize=(page_width, settings['page_height']))
+    ax.set_xlim(0, page_width)
+    ax.set_ylim(0, settings['page_height'])
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+    # Interpolate all of the page's strokes in one batch, then draw in page order
+    operations, strokes = page_marks(page, settings)
+    curves = interpolate_splines(strokes)
+
+    if settings['collect_strokes']:
+        # One artist for all strokes and one for all dots, styled like the
+        # Line2D artists drawn otherwise
+        segments = [curves[op[1]] + [0, op[2]] for op in operations if op[0] == 'stroke']
+        dots = np.array([op[1:] for op in operations if op[0] == 'dot']).reshape(-1, 2)
+        if segments:
+            ax.add_collection(LineCollection(segments, colors='k', linewidths=1.5 * scale,
+                                             capstyle='projecting', joinstyle='round',
+                                             zorder=2), autolim=False)
+        if len(dots):
+            ax.scatter(dots[:, 0], dots[:, 1], s=(2 * scale) ** 2, c='k', marker='o',
+                       edgecolors='k', linewidths=1.0, zorder=2)
+        operations = [op for op in operations if op[0] not in ('stroke', 'dot')]
+
+    for operation in operations:
+        kind = operation[0]
+        if kind == 'stroke':
+            _, index, baseline_y = operation
+            ax.plot(curves[index][:, 0], baseline_y + curves[index][:, 1],
+                    'k-', linewidth=1.5 * scale)
+        elif kind == 'dot':
+            _, x, y = operation
+            ax.plot(x, y, 'ko', markersize=2 * scale)
+        elif kind == 'baseline':
+            ax.axhline(y=operation[1], xmin=margin/page_width,
+                      xmax=(page_width-margin)/page_width,
+                      color='gray', linestyle='--', linewidth=0.5, alpha=0.5)
+        else:
+            _, x, y, label = operation
+            ax.text(x, y, label, ha='center', va='top', fontsize=8, color='gray')
+
+    return fig
+
+
+def render_page(page: dict, settings: dict, image_format: str = 'pdf') -> bytes:
+    """Render one page from `layout_pages` to the bytes of a single-page 'pdf' or 'svg'."""
+    import matplotlib.pyplot as plt
+
+    fig = draw_page(page, settings)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=image_format, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def render_page_pdf(page: dict, settings: dict) -> bytes:
+    """Render one page from `layout_pages` to the bytes of a single-page PDF."""
+    return render_page(page, settings, 'pdf')
+
+
+def read_pdf_objects(data: bytes) -> tuple[dict, bytes]:
+    """
+    Split a PDF with a classic xref table into its objects.
+
+    Returns ({object number: object body}, trailer dictionary). Bodies are the
+    bytes between "N 0 obj" and "endobj".
+    """
+    startxref = int(re.findall(rb'startxref\s+(\d+)', data)[-1])
+    trailer_start = data.index(b'trailer', startxref)
+    trailer = data[trailer_start:data.index(b'startxref', trailer_start)]
+
+    # Parse the xref subsections into object offsets
+    offsets = {}
+    fields = data[data.index(b'xref', startxref) + 4:trailer_start].split()
+    i = 0
+    while i < len(fields):
+        first, count = int(fields[i]), int(fields[i + 1])
+        i += 2
+        for number in range(first, first + count):
+            if fields[i + 2] == b'n':
+                offsets[number] = int(fields[i])
+            i += 3
+
+    # Each object runs up to the next one (or the xref table)
+    ends = sorted(offsets.values()) + [startxref]
+    objects = {}
+    for number, offset in offsets.items():
+        end = ends[ends.index(offset) + 1]
+        body = data[offset:end].rstrip()
+        body = body[body.index(b'obj') + 3:-len(b'endobj')]
+        objects[number] = body.strip(b'\r\n')
+    return objects, trailer
+
+
+class PdfWriter:
+    """
+    Writes a PDF to a binary file object one numbered object at a time.
+
+    Callers `reserve` object numbers, write the objects and `add_page` each
+    page object in order; `finish` then writes the page tree, the catalog,
+    the cross-reference table and the trailer. The catalog and page tree are
+    objects 1 and 2, so pages refer to their parent as ``2 0 R``.
+    """
+
+    CATALOG = 1
+    PAGES = 2
+
+    def __init__(self, out):
+        self.out = out
+        self.offsets = {}
+        self.kids = []
+        self.next_number = 3
+        out.write(b'%PDF-1.4\n%\xac\xdc \xab\xba\n')
+
+    def reserve(self, count: int) -> int:
+        """Reserve `count` consecutive object numbers and return the first."""
+        first = self.next_number
+        self.next_number += count
+        return first
+
+    def write_object(self, number: int, body: bytes) -> None:
+        """Write object `number` with the given body."""
+        self.offsets[number] = self.out.tell()
+        self.out.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+
+    def add_page(self, number: int) -> None:
+        """Append page object `number` to the page tree."""
+        self.kids.append(number)
+
+    def finish(self) -> None:
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        self.write_object(self.PAGES, b'<< /Type /Pages /Kids [ %s ] /Count %d >>'
+                          % (b' '.join(b'%d 0 R' % kid for kid in self.kids), len(self.kids)))
+        self.write_object(self.CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES)
+
+        xref = self.out.tell()
+        self.out.write(b'xref\n0 %d\n0000000000 65535 f \n' % self.next_number)
+        for number in range(1, self.next_number):
+            self.out.write(b'%010d 00000 n \n' % self.offsets[number])
+        self.out.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                       % (self.next_number, self.CATALOG, xref))
+
+
+def merge_pdf_pages(page_pdfs, output_path: Path) -> None:
+    """
+    Write an iterable of single-page PDFs (as bytes) into one PDF, in order.
+
+    Each input's objects are renumbered and copied as-is, except its catalog,
+    page tree and info dictionary, which are replaced by a shared page tree.
+    Pages are written as they arrive, so only one input is held at a time.
+    """
+    reference = re.compile(rb'(?<![\d.])(\d+) 0 R\b')
+    stream_start = re.compile(rb'>>\s*stream\r?\n')
+
+    with open(output_path, 'wb') as out:
+        pdf = PdfWriter(out)
+        for data in page_pdfs:
+            objects, trailer = read_pdf_objects(data)
+            root = int(re.search(rb'/Root (\d+) 0 R', trailer).group(1))
+            info = re.search(rb'/Info (\d+) 0 R', trailer)
+            pages = int(re.search(rb'/Pages (\d+) 0 R', objects[root]).group(1))
+            page_kids = re.search(rb'/Kids \[([^\]]*)\]', objects[pages]).group(1)
+
+            skipped = {root, pages, int(info.group(1)) if info else None}
+            numbers = sorted(number for number in objects if number not in skipped)
+            first = pdf.reserve(len(numbers))
+            renumber = {old: first + i for i, old in enumerate(numbers)}
+            renumber[pages] = PdfWriter.PAGES
+
+            def rewrite(match):
+                return b'%d 0 R' % renumber.get(int(match.group(1)), 0)
+
+            for old in numbers:
+                body = objects[old]
+                # Only rewrite references in the dictionary, never in stream data
+                match = stream_start.search(body)
+                split = match.end() if match else len(body)
+                body = reference.sub(rewrite, body[:split]) + body[split:]
+                pdf.write_object(renumber[old], body)
+
+            for kid in reference.findall(page_kids):
+                pdf.add_page(renumber[int(kid)])
+        pdf.finish()
+
+
+def ordered_map(executor, fn, iterable, max_pending: int):
+    """Like `executor.map`, but pulls from `iterable` lazily with at most `max_pending` tasks in flight."""
+    pending = deque()
+    for args in iterable:
+        pending.append(executor.submit(fn, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def render_pages_to_pdf(pages, output_path: Path, settings: dict, jobs: int = 1) -> None:
+    """
+    Render pages from `layout_pages` to a PDF file.
+
+    With `jobs` > 1, pages are rendered to single-page PDFs in a process pool
+    and merged in order with `merge_pdf_pages`; each page is drawn by the same
+    `draw_page` either way.
+    """
+    if jobs <= 1:
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        with profiler.stage('save'), PdfPages(output_path) as pdf:
+            for page in pages:
+                with profiler.stage('render'):
+                    fig = draw_page(page, settings)
+                try:
+                    pdf.savefig(fig, bbox_inches='tight')
+                finally:
+                    plt.close(fig)
+        return
+
+    # Time spent waiting on the workers counts as rendering
+    with ProcessPoolExecutor(max_workers=jobs) as executor, profiler.stage('save'):
+        page_pdfs = ordered_map(executor, render_page_pdf,
+                                ((page, settings) for page in pages), 2 * jobs)
+        merge_pdf_pages(profiler.timed('render', page_pdfs), output_path)
+
+
+@lru_cache(maxsize=None)
+def spline_derivative_basis(num_control: int) -> np.ndarray:
+    """
+    Return the (num_control, num_control) matrix giving the first derivatives
+    of a natural cubic spline at its knots, for knots evenly spaced on [0, 1].
+    """
+    h = 1 / (num_control - 1)
+    eye = np.eye(num_control)
+
+    # The knot second derivatives solve a tridiagonal system, zero at both ends
+    lhs = np.eye(num_control)
+    rhs = np.zeros((num_control, num_control))
+    for i in range(1, num_control - 1):
+        lhs[i, i - 1:i + 2] = [h / 6, 2 * h / 3, h / 6]
+        rhs[i, i - 1:i + 2] = [1 / h, -2 / h, 1 / h]
+    second = np.linalg.solve(lhs, rhs)
+
+    derivative = np.empty((num_control, num_control))
+    derivative[:-1] = (eye[1:] - eye[:-1]) / h - h * (2 * second[:-1] + second[1:]) / 6
+    derivative[-1] = (eye[-1] - eye[-2]) / h + h * (second[-2] + 2 * second[-1]) / 6
+    return derivative
+
+
+def spline_to_bezier(points: np.ndarray) -> np.ndarray:
+    """
+    Convert the natural cubic spline through `points` into cubic Béziers.
+
+    Each spline segment is a cubic polynomial, so it is exactly one Bézier curve
+    whose inner control points follow from the knot derivatives. Returns an
+    array of shape (n - 1, 4, 2).
+    """
+    offsets = spline_derivative_basis(len(points)) @ points / (3 * (len(points) - 1))
+    return np.stack([points[:-1], points[:-1] + offsets[:-1],
+                     points[1:] - offsets[1:], points[1:]], axis=1)
+
+
+def native_page_content(page: dict, settings: dict) -> bytes:
+    """
+    Build the PDF content stream for a page from `layout_pages`.
+
+    Strokes are written as exact Bézier paths and dots as filled circles, with
+    the same widths and sizes (in points) the matplotlib backend uses.
+    """
+    page_width = settings['page_width']
+    margin = settings['margin']
+    scale = settings['scale']
+    operations, strokes = page_marks(page, settings)
+
+    def numbers(values):
+        return ' '.join(f'{v * 72:.2f}' for v in values)
+
+    baselines = []
+    paths = []
+    dots = []
+    for operation in operations:
+        kind = operation[0]
+        if kind == 'stroke':
+            _, index, baseline_y = operation
+            curves = spline_to_bezier(strokes[index] + [0, baseline_y])
+            paths.append(numbers(curves[0, 0]) + ' m')
+            paths.extend(numbers(curve[1:].ravel()) + ' c' for curve in curves)
+        elif kind == 'dot':
+            dots.append(operation[1:])
+        elif kind == 'baseline':
+            y = operation[1]
+            baselines.append(numbers([margin, y]) + ' m ' + numbers([page_width - margin, y]) + ' l')
+
+    content = []
+    if baselines:
+        # Dashed 50% gray at half opacity on white
+        content += ['q', '0.75 G 0.5 w [1.85 0.8] 0 d'] + baselines + ['S', 'Q']
+    if paths:
+        content += ['q', f'0 G {1.5 * scale:.3f} w 2 J 1 j'] + paths + ['S', 'Q']
+    if dots:
+        # Marker plus its default 1pt edge, drawn as four Bézier quarter arcs
+        radius = (2 * scale + 1) / 2 / 72
+        k = 0.5523 * radius
+        content += ['q', '0 g']
+        for x, y in dots:
+            content += [
+                numbers([x + radius, y]) + ' m',
+                numbers([x + radius, y + k, x + k, y + radius, x, y + radius]) + ' c',
+                numbers([x - k, y + radius, x - radius, y + k, x - radius, y]) + ' c',
+                numbers([x - radius, y - k, x - k, y - radius, x, y - radius]) + ' c',
+                numbers([x + k, y - radius, x + radius, y - k, x + radius, y]) + ' c',
+            ]
+        content += ['f', 'Q']
+
+    return '\n'.join(content).encode('ascii')
+
+
+def native_page_stream(page: dict, settings: dict) -> bytes:
+    """Build the content stream for a page with `native_page_content`, compressed for the PDF."""
+    return zlib.compress(native_page_content(page, settings))
+
+
+def write_native_pdf(page_contents, output_path: Path, settings: dict,
+                     compressed: bool = False) -> None:
+    """
+    Write an iterable of page content streams to a PDF file, one page at a time.
+
+    With `compressed`, the streams are already compressed by `native_page_stream`.
+    """
+    media_box = f'[ 0 0 {settings["page_width"] * 72:.2f} {settings["page_height"] * 72:.2f} ]'
+
+    with open(output_path, 'wb') as out:
+        pdf = PdfWriter(out)
+        for content in page_contents:
+            stream = content if compressed else zlib.compress(content)
+            number = pdf.reserve(2)
+            pdf.write_object(number, b'<< /Length %d /Filter /FlateDecode >>\nstream\n'
+                             % len(stream) + stream + b'\nendstream')
+            pdf.write_object(number + 1, f'<< /Type /Page /Parent {PdfWriter.PAGES} 0 R '
+                                         f'/Resources << >>\n/MediaBox {media_box} '
+                                         f'/Contents {number} 0 R >>'.encode('ascii'))
+            pdf.add_page(number + 1)
+        pdf.finish()
+
+
+def render_pages_native(pages, output_path: Path, settings: dict, jobs: int = 1) -> None:
+    """
+    Render pages from `layout_pages` straight to PDF, without matplotlib.
+
+    With `jobs` > 1, page content streams are built in a process pool.
+    """
+    if jobs <= 1:
+        page_contents = (native_page_content(page, settings) for page in pages)
+        with profiler.stage('save'):
+            write_native_pdf(profiler.timed('render', page_contents), output_path, settings)
+        return
+
+    # Time spent waiting on the workers counts as rendering
+    with ProcessPoolExecutor(max_workers=jobs) as executor, profiler.stage('save'):
+        page_contents = ordered_map(executor, native_page_content,
+                                    ((page, settings) for page in pages), 2 * jobs)
+        write_native_pdf(profiler.timed('render', page_contents), output_path, settings)
+
+
+def svg_symbol(marks: list, scale: float) -> str:
+    """
+    Build the contents of an SVG <symbol> for one word from `word_marks`.
+
+    Coordinates are in points with y pointing down, relative to the word's
+    left edge on the baseline. Strokes are exact Bézier paths, styled by the
+    group the symbol is used in; dots are filled circles.
+    """
+    def numbers(values):
+        return ' '.join(f'{v:.2f}' for v in values)
+
+    path = []
+    dots = []
+    for mark in marks:
+        if mark[0] == 'stroke':
+            curves = spline_to_bezier(mark[1] * [72, -72])
+            path.append('M' + numbers(curves[0, 0]))
+            path.extend('C' + numbers(curve[1:].ravel()) for curve in curves)
+        else:
+            dots.append(f'<circle cx="{mark[1] * 72:.2f}" cy="{-mark[2] * 72:.2f}" '
+                        f'r="{(2 * scale + 1) / 2:.2f}" fill="#000" stroke="none"/>')
+    content = ''.join(dots)
+    if path:
+        content = f'<path d="{" ".join(path)}"/>' + content
+    return content
+
+
+def write_svg(pages, out, settings: dict) -> None:
+    """
+    Write pages from `layout_pages` to a binary file object as one SVG document.
+
+    Pages are stacked top to bottom. Each distinct word shape is defined once
+    as a <symbol> the first time it appears and every occurrence is a <use>
+    placed at the word's position, so the output grows with the vocabulary
+    rather than with the length of the text. Pages are written as they
+    arrive; the document height is filled in at the end, so `out` must be
+    seekable.
+    """
+    page_width = settings['page_width'] * 72
+    page_height = settings['page_height'] * 72
+    margin = settings['margin'] * 72
+    scale = settings['scale']
+
+    header = ('<?xml version="1.0" encoding="utf-8"?>\n'
+              '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+              f'version="1.1" width="{settings["page_width"]}in" ')
+    out.write(header.encode('utf-8'))
+    # Room for the height and view box, which depend on the page count
+    size_offset = out.tell()
+    size_width = 96
+    out.write(b' ' * size_width + b'>\n')
+
+    symbols = {}
+    num_pages = 0
+    for page in pages:
+        top = num_pages * page_height
+        num_pages += 1
+
+        words = page['words']
+        x = page['x'].tolist()
+        x_min = page['x_min'].tolist()
+        label_x = page['label_x'].tolist()
+
+        definitions = []
+        uses = []
+        labels = []
+        baselines = []
+        for line in page['lines']:
+            baseline_y = (page_height - line['baseline_y'] * 72)
+            if settings['show_baselines']:
+                baselines.append(f'M{margin:.2f} {baseline_y:.2f}H{page_width - margin:.2f}')
+
+            for i in range(line['start'], line['end']):
+                points, stroke_offsets = words.word(i)
+                if len(stroke_offsets) == 1:
+                    continue
+                key = (points.tobytes(), stroke_offsets.tobytes())
+                symbol_id = symbols.get(key)
+                if symbol_id is None:
+                    marks = word_marks(place_points(points, x_min[i], 0, settings), stroke_offsets)
+                    content = svg_symbol(marks, scale)
+                    symbol_id = symbols[key] = f'w{len(symbols)}' if content else ''
+                    if content:
+                        definitions.append(f'<symbol id="{symbol_id}" overflow="visible">'
+                                           f'{content}</symbol>')
+                if symbol_id:
+                    uses.append(f'<use xlink:href="#{symbol_id}" '
+                                f'x="{x[i] * 72:.2f}" y="{baseline_y:.2f}"/>')
+
+                label = words.labels[i]
+                if settings['beginner_mode'] and label is not None:
+                    label_y = page_height - (line['baseline_y'] + line['descent'] - 0.1) * 72
+                    labels.append(f'<text x="{label_x[i] * 72:.2f}" y="{label_y:.2f}">'
+                                  f'{escape(label)}</text>')
+
+        parts = [f'<g transform="translate(0 {top:.2f})">']
+        if definitions:
+            parts.append('<defs>' + ''.join(definitions) + '</defs>')
+        if baselines:
+            # Dashed 50% gray at half opacity on white
+            parts.append(f'<path d="{"".join(baselines)}" fill="none" stroke="#bfbfbf" '
+                         'stroke-width="0.5" stroke-dasharray="1.85 0.8"/>')
+        if uses:
+            parts.append(f'<g fill="none" stroke="#000" stroke-width="{1.5 * scale:.3f}" '
+                         'stroke-linecap="square" stroke-linejoin="round">'
+                         + ''.join(uses) + '</g>')
+        if labels:
+            parts.append('<g font-family="DejaVu Sans, sans-serif" font-size="8" fill="#808080" '
+                         'text-anchor="middle" dominant-baseline="hanging">'
+                         + ''.join(labels) + '</g>')
+        parts.append('</g>\n')
+        out.write(''.join(parts).encode('utf-8'))
+
+    out.write(b'</svg>\n')
+
+    height = max(num_pages, 1) * page_height
+    size = (f'height="{height / 72:.2f}in" '
+            f'viewBox="0 0 {page_width:.2f} {height:.2f}"').encode('ascii')
+    end = out.tell()
+    out.seek(size_offset)
+    out.write(size.ljust(size_width))
+    out.seek(end)
+
+
+def render_pages_svg(pages, output_path: Path, settings: dict) -> None:
+    """Render pages from `layout_pages` to an SVG file with `write_svg`."""
+    with open(output_path, 'wb') as out:
+        write_svg(pages, out, settings)
+
+
+def render_to_pdf(word_splines: list | PackedWords, original_words: list,
                   output_path: Path, page_size: str = 'letter',
                   show_baselines: bool = False, beginner_mode: bool = False,
-                  scale: float = 0.33) -> None:
+                  scale: float = 0.33, jobs: int = 1, backend: str = 'matplotlib',
+                  collect_strokes: bool = False) -> None:
     """
     Render tokenized words to PDF with automatic line wrapping.
 
     Args:
-        word_splines: List of word splines (each word is a list of spline point lists)
+        word_splines: Merged words from `merge_words`, or a list of word splines
+            (each word is a list of spline point lists)
         original_words: List of original words (for beginner mode labels)
         output_path: Path to output PDF file
         page_size: 'letter' or 'a4'
         show_baselines: Whether to show baseline guides
         beginner_mode: Whether to show original text under each word
         scale: Size multiplier for glyphs (default 0.33, use 1.0 for original size)
+        jobs: Number of processes rendering pages in parallel
+        backend: 'matplotlib' or 'native' (direct PDF output, no beginner mode)
+        collect_strokes: Draw each page's strokes and dots as one collection each
+            (matplotlib backend)
     """
-    # Page dimensions in inches
-    page_sizes = {
-        'letter': (8.5, 11),
-        'a4': (8.27, 11.69)
-    }
-    page_width, page_height = page_sizes.get(page_size, page_sizes['letter'])
+    if isinstance(word_splines, PackedWords):
+        words = PackedWords(word_splines.points, word_splines.stroke_offsets,
+                            word_splines.word_offsets)
+    else:
+        words = PackedWords.from_lists(word_splines)
+    # Words beyond the original words get no label
+    labels = list(original_words)[:len(words)]
+    words.labels = labels + [None] * (len(words) - len(labels))
+    render_words_to_pdf([words], output_path, page_size=page_size,
+                        show_baselines=show_baselines, beginner_mode=beginner_mode,
+                        scale=scale, jobs=jobs, backend=backend,
+                        collect_strokes=collect_strokes)
+
+
+def render_words_to_pdf(words, output_path: Path, page_size: str = 'letter',
+                        show_baselines: bool = False, beginner_mode: bool = False,
+                        scale: float = 0.33, jobs: int = 1, backend: str = 'matplotlib',
+                        collect_strokes: bool = False) -> None:
+    """
+    Render a stream of words to PDF with automatic line wrapping.
 
-    # Margins in inches
-    margin = 0.75
+    Words are laid out lazily with `layout_pages` and each page is written as
+    soon as it fills, so only the current line and page are held in memory.
 
-    # Scaling factors
-    scaling_factor = 6.0
-    glyph_scale = 0.5 * scale  # Scale glyphs to reasonable size in inches
-    space_between_words = 0.2 * scaling_factor * glyph_scale
-    line_spacing = 0.4 * scaling_factor * glyph_scale
-    if beginner_mode:
-        line_spacing = 0.7 * scaling_factor * glyph_scale  # Extra space for text labels
+    Args:
+        words: Iterable of PackedWords chunks with their original words as
+            labels, as taken by `layout_pages`
+        output_path: Path to output PDF file
+        page_size: 'letter' or 'a4'
+        show_baselines: Whether to show baseline guides
+        beginner_mode: Whether to show original text under each word
+        scale: Size multiplier for glyphs (default 0.33, use 1.0 for original size)
+        jobs: Number of processes rendering pages in parallel
+        backend: 'matplotlib', 'native' (direct PDF output, no beginner mode)
+            or 'svg' (one SVG document instead of a PDF)
+        collect_strokes: Draw each page's strokes and dots as one collection each
+            (matplotlib backend)
+    """
+    settings = page_settings(page_size, show_baselines, beginner_mode, scale, collect_strokes)
 
-    # Pre-calculate all word dimensions
-    word_dims = [calculate_word_dimensions(w, scaling_factor, glyph_scale) for w in word_splines]
+    if backend == 'native' and beginner_mode:
+        raise ValueError("Beginner mode labels require the matplotlib backend")
 
-    # In beginner mode, calculate text widths and adjust spacing
-    text_widths = []
-    if beginner_mode:
-        # Create a temporary figure to measure text
-        temp_fig, temp_ax = plt.subplots(figsize=(page_width, page_height))
-        temp_ax.set_xlim(0, page_width)
-        temp_ax.set_ylim(0, page_height)
-        renderer = temp_fig.canvas.get_renderer()
-
-        for word_idx, orig_word in enumerate(original_words):
-            if orig_word:
-                # Create text and measure its width
-                txt = temp_ax.text(0, 0, orig_word, fontsize=8)
-                bbox = txt.get_window_extent(renderer=renderer)
-                # Convert from display coordinates to data coordinates
-                bbox_data = bbox.transformed(temp_ax.transData.inverted())
-                text_width = bbox_data.width
-                txt.remove()
-            else:
-                text_width = 0
-            text_widths.append(text_width)
-
-        plt.close(temp_fig)
-
-    with PdfPages(output_path) as pdf:
-        fig, ax = plt.subplots(figsize=(page_width, page_height))
-        ax.set_xlim(0, page_width)
-        ax.set_ylim(0, page_height)
-        ax.set_aspect('equal')
-        ax.axis('off')
-
-        current_x = margin
-        current_y = page_height - margin
-        line_words = []  # Words on current line
-        line_word_indices = []  # Indices of words on current line
-
-        def render_line(fig, ax, current_y, line_words, line_word_indices):
-            """Render all words on the current line. Returns (fig, ax, new_y)."""
-            if not line_words:
-                return fig, ax, current_y
-
-            # Calculate line height from words on this line
-            line_ascent = max(word_dims[i]['ascent'] for i in line_word_indices) if line_word_indices else 0.3
-            line_descent = min(word_dims[i]['descent'] for i in line_word_indices) if line_word_indices else -0.1
-
-            # Position baseline
-            current_y -= line_ascent
-            baseline_y = current_y
-
-            # Check if we need a new page
-            needed_height = abs(line_descent) + line_spacing
-            if beginner_mode:
-                needed_height += 0.2
-
-            if current_y - needed_height < margin:
-                # Save current page and start new one
-                pdf.savefig(fig, bbox_inches='tight')
-                plt.close(fig)
-                fig, ax = plt.subplots(figsize=(page_width, page_height))
-                ax.set_xlim(0, page_width)
-                ax.set_ylim(0, page_height)
-                ax.set_aspect('equal')
-                ax.axis('off')
-                current_y = page_height - margin - line_ascent
-                baseline_y = current_y
+    # In beginner mode, text widths come from the label font's metrics
+    measure_text = label_metrics().width if beginner_mode else None
 
-            # Draw baseline if requested
-            if show_baselines:
-                ax.axhline(y=baseline_y, xmin=margin/page_width,
-                          xmax=(page_width-margin)/page_width,
-                          color='gray', linestyle='--', linewidth=0.5, alpha=0.5)
-
-            # Render each word
-            render_x = margin
-            for word_idx, word in zip(line_word_indices, line_words):
-                if not word:
-                    render_x += space_between_words
-                    continue
+    pages = layout_pages(words, settings, measure_text)
+    if profiler.enabled:
+        pages = profiler.counted_pages(profiler.timed('layout', pages))
 
-                dims = word_dims[word_idx]
-                word_start_x = render_x
-                word_end_x = render_x
-                num_splines = len(word)
-                stroke_endpoints = set()  # Track endpoints of multi-point splines
-
-                for spline_idx, spline_points in enumerate(word):
-                    if not spline_points:
-                        continue
-
-                    scaled_points = [[p[0] * scaling_factor * glyph_scale,
-                                     p[1] * scaling_factor * glyph_scale] for p in spline_points]
-
-                    # Apply word-level x offset
-                    for p in scaled_points:
-                        p[0] = p[0] - dims['x_min'] + render_x
-
-                    spline_x_max = max(p[0] for p in scaled_points)
-                    word_end_x = max(word_end_x, spline_x_max)
-
-                    if len(scaled_points) == 1:
-                        # Skip single-point splines at the start of a word (elevation markers)
-                        if spline_idx == 0:
-                            continue
-                        # Skip single-point splines that duplicate a stroke endpoint
-                        # (these are connection markers, not real dots)
-                        pt = (round(scaled_points[0][0], 4), round(scaled_points[0][1], 4))
-                        if pt in stroke_endpoints:
-                            continue
-                        ax.plot(scaled_points[0][0], baseline_y + scaled_points[0][1],
-                               'ko', markersize=2 * scale)
-                    else:
-                        x_interp, y_interp = interpolate_spline(scaled_points)
-                        ax.plot(x_interp, baseline_y + y_interp, 'k-', linewidth=1.5 * scale)
-                        # Track the endpoint of this stroke
-                        endpoint = (round(scaled_points[-1][0], 4), round(scaled_points[-1][1], 4))
-                        stroke_endpoints.add(endpoint)
-
-                # Draw original word below shorthand in beginner mode
-                if beginner_mode and word_idx < len(original_words):
-                    word_center_x = (word_start_x + word_end_x) / 2
-                    label_y = baseline_y + line_descent - 0.1
-                    ax.text(word_center_x, label_y, original_words[word_idx],
-                           ha='center', va='top', fontsize=8, color='gray')
-
-                # Use the wider of shorthand or text label for spacing
-                shorthand_width = word_end_x - word_start_x
-                if beginner_mode and word_idx < len(text_widths):
-                    # Center the text under the shorthand, so account for text extending beyond
-                    text_half_width = text_widths[word_idx] / 2
-                    shorthand_half_width = shorthand_width / 2
-                    extra_text_space = max(0, text_half_width - shorthand_half_width)
-                    render_x = word_end_x + extra_text_space + space_between_words
-                else:
-                    render_x = word_end_x + space_between_words
+    if backend == 'native':
+        render_pages_native(pages, output_path, settings, jobs)
+    elif backend == 'svg':
+        with profiler.stage('render'):
+            render_pages_svg(pages, output_path, settings)
+    else:
+        render_pages_to_pdf(pages, output_path, settings, jobs)
 
-            # Move to next line
-            current_y -= abs(line_descent) + line_spacing
 
-            return fig, ax, current_y
+def write_tokens(words, output_path: Path) -> None:
+    """
+    Write merged word geometry instead of rendering it.
+
+    `words` is an iterable of PackedWords chunks, as passed to
+    `render_words_to_pdf`. A path ending in .npz gets their arrays joined
+    (points, stroke_offsets, word_offsets) plus the original words; any other
+    path gets JSON of the form
+    ``{"words": [{"word": ..., "splines": [[[x, y], ...], ...]}, ...]}``,
+    written one chunk at a time.
+    """
+    if output_path.suffix == '.npz':
+        words = PackedWords.concatenate(list(words) or [PackedWords.from_lists([])])
+        labels = np.array([label or '' for label in words.labels], dtype=str)
+        np.savez(output_path, points=words.points, stroke_offsets=words.stroke_offsets,
+                 word_offsets=words.word_offsets, words=labels)
+        return
+
+    with open(output_path, 'w', encoding='utf-8') as out:
+        out.write('{"words": [')
+        first = True
+        for chunk in words:
+            for splines, label in zip(chunk.tolist(), chunk.labels):
+                if not first:
+                    out.write(', ')
+                first = False
+                out.write(json.dumps({'word': label, 'splines': splines}))
+        out.write(']}\n')
+
+
+def cache_key(*parts) -> str:
+    """Return a hash of a sequence of strings and bytes, for naming `RenderCache` entries."""
+    digest = hashlib.sha256(b'%d' % RENDER_CACHE_VERSION)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(b'%d:' % len(part) + part)
+    return digest.hexdigest()
+
+
+def page_key(page: dict, render_key: str) -> str:
+    """Return the cache key of a page from `layout_pages`, drawn with the settings behind `render_key`."""
+    words = page['words']
+    return cache_key(render_key, words.points.tobytes(), words.stroke_offsets.tobytes(),
+                     words.word_offsets.tobytes(), json.dumps(words.labels),
+                     *(page[name].tobytes() for name in ('x', 'x_min', 'label_x', 'label_width')),
+                     json.dumps(page['lines']))
+
+
+class RenderCache:
+    """
+    On-disk, content-addressed store for `render_file_incremental`.
+
+    Holds the merged words of processed paragraphs and the rendered bytes of
+    single pages, each in a file named by a hash of everything it was made
+    from, so entries never go stale and are shared by every document rendered
+    with the same cache. For each output file, a manifest records what its
+    last render was made of, and `prune` deletes what an earlier render used
+    once no manifest refers to it any more. The folder can be deleted at any
+    time to start over.
+    """
 
-        # Process all words with line wrapping
-        for word_idx, (word, dims) in enumerate(zip(word_splines, word_dims)):
-            word_width = dims['width']
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
 
-            # In beginner mode, account for text label width
-            if beginner_mode and word_idx < len(text_widths):
-                effective_width = max(word_width, text_widths[word_idx])
+    def _path(self, kind: str, key: str, suffix: str) -> Path:
+        return self.folder / kind / key[:2] / (key + suffix)
+
+    def _write(self, path: Path, data: bytes) -> None:
+        """Write a file atomically, so that an interrupted run leaves no partial entry."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        temp_path.write_bytes(data)
+        temp_path.replace(path)
+
+    def get_words(self, key: str) -> PackedWords | None:
+        """Return the words cached under `key`, or None on a miss."""
+        try:
+            with np.load(self._path('words', key, '.npz')) as entry:
+                return PackedWords(entry['points'], entry['stroke_offsets'], entry['word_offsets'],
+                                   json.loads(str(entry['labels'])))
+        except Exception:
+            # A truncated or damaged entry is a miss, and is written again
+            return None
+
+    def put_words(self, key: str, words: PackedWords) -> None:
+        """Cache `words` under `key`."""
+        buffer = io.BytesIO()
+        np.savez(buffer, points=words.points, stroke_offsets=words.stroke_offsets,
+                 word_offsets=words.word_offsets, labels=np.array(json.dumps(words.labels)))
+        self._write(self._path('words', key, '.npz'), buffer.getvalue())
+
+    def has_page(self, key: str) -> bool:
+        """Check whether a rendered page is cached under `key`."""
+        return self._path('pages', key, '.bin').is_file()
+
+    def get_page(self, key: str) -> bytes:
+        """Return the rendered page cached under `key`."""
+        return self._path('pages', key, '.bin').read_bytes()
+
+    def put_page(self, key: str, data: bytes) -> None:
+        """Cache a rendered page under `key`."""
+        self._write(self._path('pages', key, '.bin'), data)
+
+    def _manifest_path(self, output_path: Path) -> Path:
+        return self.folder / 'manifests' / (cache_key(str(Path(output_path).resolve())) + '.json')
+
+    def read_manifest(self, output_path: Path) -> dict:
+        """Return the manifest of the last render of `output_path`, or {} if there is none."""
+        try:
+            return json.loads(self._manifest_path(output_path).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def write_manifest(self, output_path: Path, manifest: dict) -> None:
+        """Record the manifest of a render of `output_path`."""
+        self._write(self._manifest_path(output_path), json.dumps(manifest).encode('utf-8'))
+
+    def _entries(self, manifest: dict) -> set[Path]:
+        """Paths of the cache entries a manifest refers to."""
+        return ({self._path('words', key, '.npz') for key in manifest.get('paragraphs', [])}
+                | {self._path('pages', key, '.bin') for key in manifest.get('pages', [])})
+
+    def prune(self, old_manifest: dict) -> int:
+        """
+        Delete the entries `old_manifest` referred to that no manifest in the
+        cache refers to any more, and return how many were deleted.
+
+        Called with the manifest an output replaced, this drops the paragraphs
+        and pages an edit left behind, so a document edited over and over does
+        not grow the cache without bound.
+        """
+        stale = self._entries(old_manifest)
+        if not stale:
+            return 0
+        for manifest_path in (self.folder / 'manifests').glob('*.json'):
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            stale -= self._entries(manifest)
+
+        deleted = 0
+        for path in stale:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            deleted += 1
+        return deleted
+
+
+def render_file_incremental(system: dict | CompiledSystem, input_file: Path, output_path: Path,
+                            cache_dir: Path, active_rules: list[str] | None = None,
+                            active_modes: list[str] | None = None, output_format: str = 'pdf',
+                            page_size: str = 'letter', show_baselines: bool = False,
+                            beginner_mode: bool = False, scale: float = 0.33, jobs: int = 1,
+                            backend: str = 'matplotlib', collect_strokes: bool = False) -> None:
+    """
+    Render a text file like `render_file`, redoing only what changed since the
+    last render of the same output with the same cache.
+
+    The input is read paragraph by paragraph and joined with `join_chunks`, as
+    in streaming mode. The merged words of each joined paragraph are kept in a
+    `RenderCache` in `cache_dir` under a hash of its text, the system and the
+    active rules and modes, so only new or edited paragraphs are processed and
+    tokenized again.
+
+    For PDF output, every page is rendered on its own, as with `jobs` > 1 (to
+    a compressed content stream with the native backend), and cached under a
+    hash of its layout and the page settings; the output's manifest records
+    the paragraphs and the first word of each page. A page
+    always starts with a fresh line at the top, so its layout only depends on
+    the words from its first one on. Pages ending well before the first changed
+    paragraph are therefore reused without loading their words. Layout
+    restarts one page before the page the change falls on, and stops as soon
+    as a page starts at the same word as last time with the same paragraphs
+    from there to the end, after which the old pages follow. An edit that
+    moves a page break re-renders pages until the breaks line up again, which
+    at worst is the rest of the document.
+    """
+    system = compile_system(system)
+    cache = RenderCache(cache_dir)
+    if output_format == 'svg':
+        backend = 'svg'
+    if backend == 'native' and beginner_mode:
+        raise ValueError("Beginner mode labels require the matplotlib backend")
+    settings = page_settings(page_size, show_baselines, beginner_mode, scale, collect_strokes)
+    measure_text = label_metrics().width if beginner_mode else None
+
+    words_key = cache_key('words', system.digest(), json.dumps(active_rules),
+                          json.dumps(active_modes))
+    render_key = cache_key('pages', backend, json.dumps(settings, sort_keys=True))
+    manifest = cache.read_manifest(output_path)
+
+    # Boundary checks between paragraphs are remembered from the last run too
+    known_boundaries = manifest.get('boundaries', {})
+    boundaries = {}
+
+    def separable(left, right, *args):
+        key = cache_key(words_key, left, right)
+        if key not in known_boundaries:
+            known_boundaries[key] = is_chunk_boundary_separable(left, right, *args)
+        boundaries[key] = known_boundaries[key]
+        return boundaries[key]
+
+    with open(input_file, 'r', encoding='utf-8') as f:
+        texts = list(join_chunks(read_text_chunks(f), system, active_rules, separable=separable))
+    keys = [cache_key(words_key, text) for text in texts]
+
+    def paragraph_words(i):
+        """Return the words of paragraph i, processing and caching them on a miss."""
+        words = cache.get_words(keys[i])
+        if words is not None:
+            profiler.count('cached paragraphs read')
+            return words
+        profiler.count('paragraphs processed')
+        processed_text, multi_word_matches = process_text(texts[i], system, active_rules)
+        with profiler.stage('tokenize'):
+            tokens, original_words = tokenize_with_phrases(
+                processed_text, system, active_modes, multi_word_matches
+            )
+        with profiler.stage('merge'):
+            words = merge_words(tokens, original_words)
+        cache.put_words(keys[i], words)
+        return words
+
+    if output_format != 'pdf':
+        words = (paragraph_words(i) for i in range(len(texts)))
+        if output_format == 'tokens':
+            write_tokens(words, output_path)
+        else:
+            render_words_to_pdf(words, output_path, page_size=page_size,
+                                show_baselines=show_baselines, beginner_mode=beginner_mode,
+                                scale=scale, backend=backend)
+        cache.write_manifest(output_path, {'boundaries': boundaries, 'paragraphs': keys})
+        profiler.count('cache entries pruned', cache.prune(manifest))
+        return
+
+    # Word counts of paragraphs seen last time come from the manifest
+    old_keys = manifest.get('paragraphs', [])
+    old_counts = manifest.get('counts', [])
+    known_counts = dict(zip(old_keys, old_counts))
+    counts = [known_counts[key] if key in known_counts else len(paragraph_words(i))
+              for i, key in enumerate(keys)]
+    offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).tolist()
+
+    # The old pages can only be reused if they were drawn the same way and are all still cached
+    old_pages = manifest.get('pages', [])
+    old_starts = manifest.get('page_starts', [])
+    if manifest.get('render_key') != render_key or not all(cache.has_page(key) for key in old_pages):
+        old_keys, old_counts, old_pages, old_starts = [], [], [], []
+    old_offsets = np.concatenate(([0], np.cumsum(old_counts, dtype=np.int64))).tolist()
+    old_page_index = {start: k for k, start in enumerate(old_starts)}
+
+    # Paragraphs shared with the last run at the start and at the end
+    shared = min(len(keys), len(old_keys))
+    prefix = 0
+    while prefix < shared and keys[prefix] == old_keys[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shared - prefix and keys[-1 - suffix] == old_keys[-1 - suffix]:
+        suffix += 1
+
+    if prefix == len(keys) == len(old_keys):
+        resume = len(old_pages)
+    else:
+        # A page's last line depends on the first word of the next page, so
+        # the page before the changed one is laid out again too
+        changed = bisect.bisect_right(old_starts, offsets[prefix]) - 1
+        resume = max(changed - 1, 0)
+    page_keys = old_pages[:resume]
+    page_starts = old_starts[:resume]
+    profiler.count('pages reused', resume)
+
+    def old_position(position):
+        """Map a word position to the same word of the last run, if the text from there on is unchanged."""
+        i = bisect.bisect_right(offsets, position) - 1
+        if i < len(keys) - suffix:
+            return None
+        return position - offsets[i] + old_offsets[i - len(keys) + len(old_keys)]
+
+    def words_from(start):
+        first = bisect.bisect_right(offsets, start) - 1
+        for i in range(first, len(keys)):
+            words = paragraph_words(i)
+            yield words[start - offsets[i]:] if i == first else words
+
+    def relaid_pages():
+        """Lay out pages from the resume point, yielding (key, page) for those not cached yet."""
+        position = old_starts[resume] if resume < len(old_starts) else 0
+        pages = layout_pages(words_from(position), settings, measure_text)
+        if profiler.enabled:
+            pages = profiler.counted_pages(profiler.timed('layout', pages))
+        for page in pages:
+            old = old_position(position)
+            if old in old_page_index:
+                # Back in step with the last run: the remaining pages are the old ones
+                k = old_page_index[old]
+                page_keys.extend(old_pages[k:])
+                page_starts.extend(start - old + position for start in old_starts[k:])
+                profiler.count('pages reused', len(old_pages) - k)
+                return
+            key = page_key(page, render_key)
+            page_keys.append(key)
+            page_starts.append(position)
+            position += len(page['words'])
+            if cache.has_page(key):
+                profiler.count('pages reused')
             else:
-                effective_width = word_width
-
-            # Check if word fits on current line
-            if current_x + effective_width > page_width - margin and line_words:
-                # Render current line and start new one
-                fig, ax, current_y = render_line(fig, ax, current_y, line_words, line_word_indices)
-                line_words = []
-                line_word_indices = []
-                current_x = margin
-
-            # Add word to current line
-            line_words.append(word)
-            line_word_indices.append(word_idx)
-            current_x += effective_width + space_between_words
-
-        # Render final line
-        if line_words:
-            fig, ax, current_y = render_line(fig, ax, current_y, line_words, line_word_indices)
-
-        pdf.savefig(fig, bbox_inches='tight')
-        plt.close(fig)
+                yield key, page
+
+    if resume < len(old_pages) or not old_pages:
+        render = native_page_stream if backend == 'native' else render_page_pdf
+        with (ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()) as executor:
+            if executor is None:
+                for key, page in relaid_pages():
+                    with profiler.stage('render'):
+                        cache.put_page(key, render(page, settings))
+            else:
+                # Time spent waiting on the workers counts as rendering
+                pending_keys = deque()
+
+                def tasks():
+                    for key, page in relaid_pages():
+                        pending_keys.append(key)
+                        yield page, settings
+
+                rendered = ordered_map(executor, render, tasks(), 2 * jobs)
+                for data in profiler.timed('render', rendered):
+                    cache.put_page(pending_keys.popleft(), data)
+
+    with profiler.stage('save'):
+        page_data = (cache.get_page(key) for key in page_keys)
+        if backend == 'native':
+            write_native_pdf(page_data, output_path, settings, compressed=True)
+        else:
+            merge_pdf_pages(page_data, output_path)
+
+    cache.write_manifest(output_path, {
+        'render_key': render_key,
+        'boundaries': boundaries,
+        'paragraphs': keys,
+        'counts': counts,
+        'page_starts': page_starts,
+        'pages': page_keys,
+    })
+    profiler.count('cache entries pruned', cache.prune(manifest))
+
+
+def render_file(system: dict | CompiledSystem, input_file: Path, output_path: Path,
+                active_rules: list[str] | None = None, active_modes: list[str] | None = None,
+                stream: bool = False, output_format: str = 'pdf', page_size: str = 'letter',
+                show_baselines: bool = False, beginner_mode: bool = False, scale: float = 0.33,
+                jobs: int = 1, backend: str = 'matplotlib', collect_strokes: bool = False,
+                cache_dir: Path | None = None) -> None:
+    """
+    Render a text file to PDF with a loaded system.
+
+    With `stream`, the input is processed, tokenized and rendered one
+    paragraph at a time; otherwise it is read and processed as a whole. With
+    `output_format` 'svg', the output is an SVG document, and with 'tokens'
+    the merged geometry is written with `write_tokens` instead of being
+    rendered. The remaining arguments are passed on to `render_words_to_pdf`.
+    With `jobs` > 1, input read as a whole is also tokenized in parallel by
+    `tokenize_parallel`.
+
+    With a `cache_dir`, the file is rendered incrementally by
+    `render_file_incremental` instead, which reads it paragraph by paragraph
+    whether or not `stream` is set.
+    """
+    if cache_dir is not None:
+        render_file_incremental(system, input_file, output_path, cache_dir,
+                                active_rules=active_rules, active_modes=active_modes,
+                                output_format=output_format, page_size=page_size,
+                                show_baselines=show_baselines, beginner_mode=beginner_mode,
+                                scale=scale, jobs=jobs, backend=backend,
+                                collect_strokes=collect_strokes)
+        return
+
+    system = compile_system(system)
+    if output_format == 'svg':
+        backend = 'svg'
+    render_options = dict(page_size=page_size, show_baselines=show_baselines,
+                          beginner_mode=beginner_mode, scale=scale, jobs=jobs,
+                          backend=backend, collect_strokes=collect_strokes)
+
+    if stream:
+        # Process, tokenize and render one paragraph at a time
+        with open(input_file, 'r', encoding='utf-8') as f:
+            words = stream_words(read_text_chunks(f), system, active_rules, active_modes)
+            if output_format == 'tokens':
+                write_tokens(words, output_path)
+            else:
+                render_words_to_pdf(words, output_path, **render_options)
+        return
+
+    # Read input text
+    with open(input_file, 'r', encoding='utf-8') as f:
+        input_text = f.read()
+
+    # Process text (now treats all input as continuous text)
+    processed_text, multi_word_matches = process_text(input_text, system, active_rules)
+
+    if jobs > 1:
+        # Tokenize and merge slices of the text in parallel
+        with profiler.stage('tokenize'):
+            words = tokenize_parallel(processed_text, system, active_modes,
+                                      multi_word_matches, jobs)
+    else:
+        # Tokenize all words
+        with profiler.stage('tokenize'):
+            tokens, original_words = tokenize_with_phrases(
+                processed_text, system, active_modes, multi_word_matches
+            )
+
+        # Merge word splines
+        with profiler.stage('merge'):
+            words = [merge_words(tokens, original_words)]
+
+    if output_format == 'tokens':
+        write_tokens(words, output_path)
+        return
+
+    # Render to PDF with automatic line wrapping
+    render_words_to_pdf(words, output_path, **render_options)
+
+
+def report_profile(system: CompiledSystem, show: bool, json_path: Path | None) -> None:
+    """Print and/or save the profile of this run, if profiling is on."""
+    if not profiler.enabled:
+        return
+
+    profiler.count('token cache hits', system.token_cache.hits)
+    profiler.count('token cache misses', system.token_cache.misses)
+
+    if show:
+        profiler.print_report()
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(profiler.report(), f, indent=2)
+        print(f"Profile written: {json_path}")
 
 
 def main():
@@ -583,6 +2762,13 @@ Examples:
     python generate_pdf.py static/data/systems/orthic sample.txt output.pdf --beginner
     python generate_pdf.py static/data/systems/orthic sample.txt output.pdf --page-size a4
     python generate_pdf.py static/data/systems/orthic sample.txt output.pdf --rules "Remove consecutive duplicates"
+    python generate_pdf.py static/data/systems/orthic book.txt output.pdf --stream
+    python generate_pdf.py static/data/systems/orthic book.txt output.pdf --jobs 8
+    python generate_pdf.py static/data/systems/orthic book.txt output.pdf --backend native
+    python generate_pdf.py static/data/systems/orthic book.txt output.pdf --profile
+    python generate_pdf.py static/data/systems/orthic notes.txt notes.pdf --incremental
+    python generate_pdf.py static/data/systems/orthic sample.txt output.svg --format svg
+    python generate_pdf.py static/data/systems/orthic sample.txt tokens.json --format tokens
         '''
     )
 
@@ -591,7 +2777,12 @@ Examples:
     parser.add_argument('input_file', type=Path,
                        help='Path to input text file')
     parser.add_argument('output_pdf', type=Path,
-                       help='Path to output PDF file')
+                       help='Path to output PDF file (or tokens file with --format tokens)')
+    parser.add_argument('--format', choices=['pdf', 'svg', 'tokens'], default='pdf',
+                       help='Output format; svg writes all pages as one SVG document with each '
+                            'distinct word defined once, and tokens writes the merged stroke '
+                            'geometry of each word as JSON, or as flat arrays if the output ends '
+                            'in .npz, without loading the plotting libraries (default: pdf)')
     parser.add_argument('--page-size', choices=['letter', 'a4'], default='letter',
                        help='Page size (default: letter)')
     parser.add_argument('--rules', type=str, default=None,
@@ -604,9 +2795,42 @@ Examples:
                        help='Show original text word under each shorthand word')
     parser.add_argument('--scale', type=float, default=0.33,
                        help='Size multiplier for glyphs (default: 0.33, use 1.0 for original large size)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_TOKEN_CACHE_SIZE,
+                       help=f'Number of distinct words to keep in the tokenization cache '
+                            f'(default: {DEFAULT_TOKEN_CACHE_SIZE}, 0 to disable)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Read and render the input paragraph by paragraph, writing each page '
+                            'as soon as it fills (keeps memory flat for book-length input)')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Number of processes rendering pages, and tokenizing the words of '
+                            'input read as a whole, in parallel (default: 1)')
+    parser.add_argument('--backend', choices=['matplotlib', 'native'], default='matplotlib',
+                       help='PDF output engine; native writes Bézier curves directly and is much '
+                            'faster, but does not support --beginner (default: matplotlib)')
+    parser.add_argument('--collect-strokes', action='store_true',
+                       help='Draw all strokes and dots of a page as one collection each, '
+                            'which speeds up saving dense pages (matplotlib backend)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Cache the geometry of every paragraph and every rendered page, and on '
+                            'later runs process only edited paragraphs and render only the pages '
+                            'around them (reads the input paragraph by paragraph)')
+    parser.add_argument('--cache-dir', type=Path, default=None,
+                       help=f'Cache folder of --incremental, which it implies '
+                            f'(default: {RENDER_CACHE_NAME} next to the output)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print the time spent in each stage and counters such as regex '
+                            'searches, cache hits and strokes drawn')
+    parser.add_argument('--profile-json', type=Path, default=None,
+                       help='Write the profile to this JSON file')
 
     args = parser.parse_args()
 
+    if args.backend == 'native' and args.beginner and args.format == 'pdf':
+        parser.error('--beginner requires --backend matplotlib')
+
+    if args.profile or args.profile_json:
+        profiler.enable()
+
     # Validate inputs
     if not args.system_folder.is_dir():
         print(f"Error: System folder not found: {args.system_folder}", file=sys.stderr)
@@ -618,7 +2842,8 @@ Examples:
 
     # Load system
     try:
-        system = load_system(args.system_folder)
+        with profiler.stage('load'):
+            system = compile_system(load_system(args.system_folder), args.cache_size)
     except FileNotFoundError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -626,10 +2851,6 @@ Examples:
         print(f"Error: Invalid JSON in system files: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Read input text
-    with open(args.input_file, 'r', encoding='utf-8') as f:
-        input_text = f.read()
-
     # Parse rule and mode filters
     active_rules = None
     if args.rules:
@@ -639,25 +2860,31 @@ Examples:
     if args.modes:
         active_modes = [m.strip() for m in args.modes.split(',')]
 
-    # Process text (now treats all input as continuous text)
-    processed_text, multi_word_matches = process_text(input_text, system, active_rules)
-
-    # Tokenize all words
-    tokens, original_words = tokenize_with_phrases(
-        processed_text, system, active_modes, multi_word_matches
-    )
-
-    # Merge word splines
-    merged_words = merge_word_splines(tokens)
-
-    # Render to PDF with automatic line wrapping
-    render_to_pdf(merged_words, original_words, args.output_pdf,
-                  page_size=args.page_size,
-                  show_baselines=args.show_baselines,
-                  beginner_mode=args.beginner,
-                  scale=args.scale)
-
-    print(f"PDF generated: {args.output_pdf}")
+    cache_dir = args.cache_dir
+    if args.incremental and cache_dir is None:
+        cache_dir = args.output_pdf.parent / RENDER_CACHE_NAME
+
+    render_file(system, args.input_file, args.output_pdf,
+                active_rules=active_rules,
+                active_modes=active_modes,
+                stream=args.stream,
+                output_format=args.format,
+                page_size=args.page_size,
+                show_baselines=args.show_baselines,
+                beginner_mode=args.beginner,
+                scale=args.scale,
+                jobs=args.jobs,
+                backend=args.backend,
+                collect_strokes=args.collect_strokes,
+                cache_dir=cache_dir)
+
+    if args.format == 'tokens':
+        print(f"Tokens written: {args.output_pdf}")
+    elif args.format == 'svg':
+        print(f"SVG generated: {args.output_pdf}")
+    else:
+        print(f"PDF generated: {args.output_pdf}")
+    report_profile(system, args.profile, args.profile_json)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Shorthand Render Service
+
+Serves generate_pdf.py over HTTP from long-running worker processes. Each
+worker loads and compiles the bundled systems once and keeps their
+tokenization caches warm, so a short snippet renders in milliseconds instead
+of paying for a cold start on every request.
+
+Usage:
+    python render_server.py [--port 5000] [--workers 4] [--queue-size 16]
+
+Example:
+    python scripts/render_server.py --workers 4
+    curl -X POST localhost:5000/render -H 'Content-Type: application/json' \\
+         -d '{"system": "orthic", "text": "hello world"}' -o hello.pdf
+"""
+
+import argparse
+import io
+import math
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from flask import Flask, Response, jsonify, request
+
+from generate_pdf import (
+    DEFAULT_TOKEN_CACHE_SIZE,
+    compile_system,
+    label_metrics,
+    layout_pages,
+    load_system,
+    merge_words,
+    page_settings,
+    process_text,
+    render_to_pdf,
+    tokenize_with_phrases,
+    write_svg,
+    write_tokens,
+)
+
+SYSTEMS_FOLDER = Path(__file__).resolve().parent.parent / 'static' / 'data' / 'systems'
+
+# Response content type of each output format
+FORMATS = {
+    'pdf': 'application/pdf',
+    'svg': 'image/svg+xml',
+    'tokens': 'application/json',
+}
+
+# Largest request body accepted, in bytes; a longer text could exhaust a worker's memory
+DEFAULT_MAX_REQUEST_SIZE = 2 * 1024 * 1024
+
+# Compiled systems of the current worker process, by name
+_systems = {}
+_cache_size = DEFAULT_TOKEN_CACHE_SIZE
+
+
+def available_systems() -> list[str]:
+    """Return the names of the bundled systems."""
+    return sorted(path.name for path in SYSTEMS_FOLDER.iterdir() if path.is_dir())
+
+
+def get_system(name: str):
+    """Return the compiled system `name`, loading it on first use in this process."""
+    system = _systems.get(name)
+    if system is None:
+        system = compile_system(load_system(SYSTEMS_FOLDER / name), _cache_size)
+        _systems[name] = system
+    return system
+
+
+def warm_worker(system_names: list[str], cache_size: int) -> None:
+    """Worker initializer: compile the systems and load the label font up front."""
+    global _cache_size
+    _cache_size = cache_size
+    for name in system_names:
+        get_system(name)
+    label_metrics()
+
+
+def parse_options(payload: dict) -> dict:
+    """
+    Validate a render request and fill in defaults.
+
+    Raises ValueError with a message for the client if the request is invalid.
+    """
+    text = payload.get('text')
+    if not isinstance(text, str):
+        raise ValueError("'text' must be a string")
+
+    system = payload.get('system', 'orthic')
+    if system not in available_systems():
+        raise ValueError(f"unknown system: {system}")
+
+    image_format = payload.get('format', 'pdf')
+    if image_format not in FORMATS:
+        raise ValueError(f"'format' must be one of: {', '.join(FORMATS)}")
+
+    def flag(key):
+        value = payload.get(key, False)
+        if isinstance(value, str):
+            return value.strip().lower() not in ('', '0', 'false', 'no', 'off')
+        return bool(value)
+
+    def name_list(key):
+        value = payload.get(key)
+        if isinstance(value, str):
+            value = [name.strip() for name in value.split(',')]
+        if value is not None and not (isinstance(value, list)
+                                      and all(isinstance(name, str) for name in value)):
+            raise ValueError(f"'{key}' must be a list of names or a comma-separated string")
+        return value
+
+    page_size = payload.get('page_size', 'letter')
+    if page_size not in ('letter', 'a4'):
+        raise ValueError("'page_size' must be 'letter' or 'a4'")
+
+    beginner = flag('beginner')
+    # The native backend is the fast default, but cannot draw beginner labels
+    backend = payload.get('backend', 'matplotlib' if beginner else 'native')
+    if backend not in ('matplotlib', 'native'):
+        raise ValueError("'backend' must be 'matplotlib' or 'native'")
+    if backend == 'native' and beginner:
+        raise ValueError("'beginner' requires the matplotlib backend")
+
+    try:
+        scale = float(payload.get('scale', 0.33))
+    except (TypeError, ValueError):
+        raise ValueError("'scale' must be a number")
+    if not math.isfinite(scale) or scale <= 0:
+        raise ValueError("'scale' must be a positive number")
+
+    return {
+        'text': text,
+        'system': system,
+        'format': image_format,
+        'rules': name_list('rules'),
+        'modes': name_list('modes'),
+        'page_size': page_size,
+        'show_baselines': flag('show_baselines'),
+        'beginner': beginner,
+        'scale': scale,
+        'backend': backend,
+        'collect_strokes': flag('collect_strokes'),
+    }
+
+
+def render_job(options: dict) -> bytes:
+    """Run one request through the pipeline in a worker process and return the response body."""
+    system = get_system(options['system'])
+    processed_text, multi_word_matches = process_text(options['text'], system, options['rules'])
+    tokens, original_words = tokenize_with_phrases(
+        processed_text, system, options['modes'], multi_word_matches
+    )
+    merged_words = merge_words(tokens, original_words)
+
+    if options['format'] == 'svg':
+        settings = page_settings(options['page_size'], options['show_baselines'],
+                                 options['beginner'], options['scale'])
+        measure_text = label_metrics().width if options['beginner'] else None
+        buffer = io.BytesIO()
+        write_svg(layout_pages([merged_words], settings, measure_text), buffer, settings)
+        return buffer.getvalue()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if options['format'] == 'tokens':
+            output_path = Path(tmp) / 'output.json'
+            write_tokens([merged_words], output_path)
+            return output_path.read_bytes()
+
+        output_path = Path(tmp) / 'output.pdf'
+        render_to_pdf(merged_words, original_words, output_path,
+                      page_size=options['page_size'],
+                      show_baselines=options['show_baselines'],
+                      beginner_mode=options['beginner'],
+                      scale=options['scale'],
+                      backend=options['backend'],
+                      collect_strokes=options['collect_strokes'])
+        return output_path.read_bytes()
+
+
+def create_app(workers: int = 1, queue_size: int = 16,
+               cache_size: int = DEFAULT_TOKEN_CACHE_SIZE, timeout: float = 60.0,
+               max_request_size: int = DEFAULT_MAX_REQUEST_SIZE) -> Flask:
+    """
+    Create the Flask app and its pool of warm worker processes.
+
+    At most `workers` renders run at once and up to `queue_size` more wait for
+    a worker; requests beyond that are turned away with 503 rather than queued
+    without bound. A request waiting longer than `timeout` seconds gets 504,
+    and a body over `max_request_size` bytes gets 413. If a worker dies, the
+    requests it took down get 503 and a fresh pool takes over.
+    """
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = max_request_size
+
+    def start_workers():
+        return ProcessPoolExecutor(max_workers=workers, initializer=warm_worker,
+                                   initargs=(available_systems(), cache_size))
+
+    executor = start_workers()
+    executor_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def replace_broken(broken):
+        """Start a fresh pool in place of one whose worker died, unless another request already has."""
+        nonlocal executor
+        with executor_lock:
+            if executor is broken:
+                executor = start_workers()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def worker_died():
+        return jsonify({'error': 'render worker died, please retry'}), 503, {'Retry-After': '1'}
+
+    @app.errorhandler(413)
+    def too_large(e):
+        return jsonify({'error': f'request body is larger than {max_request_size} bytes'}), 413
+
+    @app.get('/health')
+    def health():
+        return jsonify({'status': 'ok', 'workers': workers, 'queue_size': queue_size})
+
+    @app.get('/systems')
+    def systems():
+        return jsonify(available_systems())
+
+    @app.post('/render')
+    def render():
+        payload = request.get_json(silent=True)
+        if payload is None:
+            payload = request.form.to_dict()
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'request body must be a JSON object'}), 400
+        try:
+            options = parse_options(payload)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not slots.acquire(blocking=False):
+            return jsonify({'error': 'render queue is full'}), 503, {'Retry-After': '1'}
+        current = executor
+        try:
+            future = current.submit(render_job, options)
+        except BrokenProcessPool:
+            slots.release()
+            replace_broken(current)
+            return worker_died()
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            body = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            return jsonify({'error': 'render timed out'}), 504
+        except BrokenProcessPool:
+            replace_broken(current)
+            return worker_died()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return Response(body, mimetype=FORMATS[options['format']])
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve shorthand rendering over HTTP from warm worker processes',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Endpoints:
+    GET  /health    service status
+    GET  /systems   names of the bundled systems
+    POST /render    JSON or form fields: text, system, format (pdf, svg, tokens),
+                    rules, modes, page_size, show_baselines, beginner, scale,
+                    backend, collect_strokes
+
+Examples:
+    python scripts/render_server.py
+    python scripts/render_server.py --workers 4 --queue-size 32
+        '''
+    )
+
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                       help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5000,
+                       help='Port to listen on (default: 5000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Number of render worker processes (default: number of CPUs)')
+    parser.add_argument('--queue-size', type=int, default=16,
+                       help='Requests allowed to wait for a worker before new ones are '
+                            'rejected with 503 (default: 16)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_TOKEN_CACHE_SIZE,
+                       help=f'Distinct words kept in each system\'s tokenization cache, per worker '
+                            f'(default: {DEFAULT_TOKEN_CACHE_SIZE})')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                       help='Seconds a request may wait for its render (default: 60)')
+    parser.add_argument('--max-request-size', type=int, default=DEFAULT_MAX_REQUEST_SIZE,
+                       help=f'Largest request body accepted, in bytes '
+                            f'(default: {DEFAULT_MAX_REQUEST_SIZE})')
+
+    args = parser.parse_args()
+
+    app = create_app(args.workers, args.queue_size, args.cache_size, args.timeout,
+                     args.max_request_size)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
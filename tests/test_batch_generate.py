@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import batch_generate  # noqa: E402
+
+real_render_document = batch_generate.render_document
+
+
+def fake_render_file(system, input_file, output_path, **options):
+    """Stand-in for render_file whose worker process dies on crash.txt."""
+    if input_file.name == 'crash.txt':
+        os._exit(1)
+    if input_file.name == 'error.txt':
+        raise ValueError('bad document')
+    output_path.write_text(input_file.read_text())
+
+
+def render_with_fake(input_file, output_path, options):
+    """render_document with the stand-in render_file, importable by workers of any start method."""
+    batch_generate.render_file = fake_render_file
+    return real_render_document(input_file, output_path, options)
+
+
+@pytest.fixture(params=multiprocessing.get_all_start_methods())
+def start_method(request):
+    previous = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method(request.param, force=True)
+    yield request.param
+    multiprocessing.set_start_method(previous, force=True)
+
+
+def test_dead_worker_fails_only_its_document(tmp_path, monkeypatch, start_method):
+    monkeypatch.setattr(batch_generate, 'render_document', render_with_fake)
+    names = ['doc1.txt', 'crash.txt', 'doc3.txt', 'error.txt', 'doc5.txt', 'doc6.txt']
+    documents = []
+    for name in names:
+        input_file = tmp_path / name
+        input_file.write_text(name)
+        documents.append((input_file, tmp_path / f'{input_file.stem}.pdf'))
+
+    results = {Path(result['input']).name: result
+               for result in batch_generate.render_parallel(None, documents, {}, jobs=2)}
+
+    assert sorted(results) == sorted(names)
+    assert not results['crash.txt']['ok']
+    assert results['crash.txt']['error'].startswith('BrokenProcessPool')
+    assert not results['error.txt']['ok']
+    assert results['error.txt']['error'] == 'ValueError: bad document'
+    for name in ['doc1.txt', 'doc3.txt', 'doc5.txt', 'doc6.txt']:
+        assert results[name]['ok'], results[name]
+        assert (tmp_path / name).with_suffix('.pdf').read_text() == name
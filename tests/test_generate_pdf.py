@@ -0,0 +1,75 @@
+import re
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import generate_pdf  # noqa: E402
+from generate_pdf import (  # noqa: E402
+    compile_system,
+    load_system,
+    process_text,
+    translate_replacement,
+)
+
+SYSTEMS_FOLDER = Path(__file__).resolve().parent.parent / 'static' / 'data' / 'systems'
+
+
+def test_digest_does_not_depend_on_system_cache(tmp_path):
+    system_folder = tmp_path / 'orthic'
+    shutil.copytree(SYSTEMS_FOLDER / 'orthic', system_folder)
+    (system_folder / generate_pdf.SYSTEM_CACHE_NAME).unlink(missing_ok=True)
+
+    from_json = load_system(system_folder)
+    assert (system_folder / generate_pdf.SYSTEM_CACHE_NAME).is_file()
+    from_cache = load_system(system_folder)
+    assert from_cache is not from_json
+
+    assert compile_system(from_json).digest() == compile_system(from_cache).digest()
+    assert compile_system(load_system(system_folder, use_cache=False)).digest() == \
+        compile_system(from_cache).digest()
+
+
+def js_replace(pattern, replacement, text):
+    """Replace every match like JavaScript's text.replace(/pattern/g, replacement)."""
+    regex = re.compile(pattern)
+    return regex.sub(translate_replacement(replacement, regex), text)
+
+
+def test_replacement_group_numbers():
+    assert js_replace(r'(a)(b)', '$2$1', 'xaby') == 'xbay'
+    # An unmatched group is empty
+    assert js_replace(r'(x)?a', '[$1]', 'a') == '[]'
+    # $nn is group nn if it exists, otherwise group n followed by a digit
+    assert js_replace(r'(a)(b)', '$10', 'ab') == 'a0'
+    assert js_replace(r'(a)(b)(c)(d)(e)(f)(g)(h)(i)(j)', '$10', 'abcdefghij') == 'j'
+    # Groups that do not exist, and $0, are kept literally
+    assert js_replace(r'(a)', '$2$0', 'a') == '$2$0'
+
+
+def test_replacement_special_tokens():
+    assert js_replace(r'b+', '[$&]', 'abbc') == 'a[bb]c'
+    assert js_replace(r'b', '$$1', 'abc') == 'a$1c'
+    # Backslashes are literal in JavaScript replacements
+    assert js_replace(r'(b)', r'\1', 'abc') == r'a\1c'
+
+
+def test_replacement_named_groups():
+    assert js_replace(r'(?P<first>a)(?P<second>b)', '$<second>$<first>', 'ab') == 'ba'
+    # An unknown name is empty when the regex has named groups, and literal otherwise
+    assert js_replace(r'(?P<first>a)', '[$<other>]', 'a') == '[]'
+    assert js_replace(r'(a)', '[$<first>]', 'a') == '[$<first>]'
+
+
+def test_replacement_before_and_after_match():
+    regex = re.compile('b')
+    replacement = translate_replacement("[$`|$']", regex)
+    assert callable(replacement)
+    assert regex.sub(replacement, 'abc') == 'a[a|c]c'
+    assert js_replace('b', "$'$&$`", 'xbz') == 'xzbxz'
+
+
+def test_dance_rule_expands_groups():
+    system = compile_system(load_system(SYSTEMS_FOLDER / 'dance'))
+    assert process_text('All lot', system, ['L carries vowel']) == ('aLl Lot', [])